@@ -1,14 +1,17 @@
 """The EHEIM Digital integration."""
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.const import CONF_IP_ADDRESS
+from homeassistant.exceptions import ConfigEntryNotReady
 
 from homeassistant.helpers import device_registry as dr
 
 
-from .const import DOMAIN, LOGGER, PLATFORMS
-from .websocket import EheimDigitalWebSocketClient
-from .coordinator import EheimDigitalDataUpdateCoordinator
+from .const import DOMAIN, FIRST_REFRESH_CONNECT_TIMEOUT, LOGGER, PLATFORMS
+from .devices import EheimDevice
+from .inventory import EheimDeviceInventory
+from .websocket import EheimDigitalWebSocketClient, EheimDigitalWebSocketClientError
+from .coordinator import EheimDigitalDataUpdateCoordinator, snapshot_store
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -19,14 +22,74 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         hass.data[DOMAIN] = {}
 
     websocket_client = EheimDigitalWebSocketClient(entry.data[CONF_IP_ADDRESS])
-    devices = await websocket_client.fetch_devices()
+    inventory = EheimDeviceInventory(hass, entry)
+
+    # Set up from the cached inventory and check it against the master later
+    devices = await inventory.async_load()
+    revalidate = devices is not None
+    if devices is None:
+        try:
+            devices = await websocket_client.fetch_devices()
+        except EheimDigitalWebSocketClientError as error:
+            await websocket_client.disconnect_websocket()
+            raise ConfigEntryNotReady(error) from error
+        await inventory.async_save(devices)
 
     coordinator = EheimDigitalDataUpdateCoordinator(hass, entry, websocket_client)
     coordinator.devices = devices
 
-    await coordinator.async_config_entry_first_refresh()
+    # Serve the last known data as stale and refresh it in the background
+    if await coordinator.async_restore_snapshot():
+        coordinator.async_set_updated_data(coordinator.store)
+        websocket_client.start()
+        entry.async_create_background_task(
+            hass,
+            _async_first_refresh(coordinator),
+            f"{DOMAIN} first refresh {entry.entry_id}",
+        )
+    else:
+        try:
+            if not websocket_client.is_connected:
+                await websocket_client.connect_websocket()
+            await coordinator.async_config_entry_first_refresh()
+        except ConfigEntryNotReady:
+            await coordinator.async_shutdown()
+            raise
+        except EheimDigitalWebSocketClientError as error:
+            await coordinator.async_shutdown()
+            raise ConfigEntryNotReady(error) from error
+
+    _async_register_devices(hass, entry, devices)
+
+    entry.async_on_unload(entry.add_update_listener(update_listener))
+
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
+
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
+    if revalidate:
+        entry.async_create_background_task(
+            hass,
+            _async_revalidate_inventory(hass, entry, coordinator, inventory),
+            f"{DOMAIN} inventory revalidation {entry.entry_id}",
+        )
+
+    return True
+
 
-    # Register devices with Home Assistant's device registry
+async def _async_first_refresh(coordinator: EheimDigitalDataUpdateCoordinator) -> None:
+    """Refresh the restored data as soon as the master is connected."""
+    if await coordinator.websocket_client.wait_connected(
+        FIRST_REFRESH_CONNECT_TIMEOUT
+    ):
+        await coordinator.async_refresh()
+
+
+@callback
+def _async_register_devices(
+    hass: HomeAssistant, entry: ConfigEntry, devices: list[EheimDevice]
+) -> None:
+    """Register devices with Home Assistant's device registry."""
     device_registry = dr.async_get(hass)
 
     for device in devices:
@@ -42,13 +105,54 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         # LOGGER.debug("INIT: Registered device Name: %s, MAC: %s, Type: %s, Version: %s",
         #             device.name, device.mac, device.device_type, device.version)
 
-    entry.async_on_unload(entry.add_update_listener(update_listener))
-
-    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
 
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-
-    return True
+async def _async_revalidate_inventory(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    coordinator: EheimDigitalDataUpdateCoordinator,
+    inventory: EheimDeviceInventory,
+) -> None:
+    """Compare the cached inventory with the devices on the master.
+
+    Changed devices are updated in place. Added or removed devices reload
+    the config entry so the platforms set up the matching entities.
+    """
+    try:
+        live_devices = await coordinator.websocket_client.fetch_devices()
+    except EheimDigitalWebSocketClientError as error:
+        LOGGER.warning("INIT: Could not revalidate the device inventory: %s", error)
+        return
+
+    cached = {device.mac: device for device in coordinator.devices}
+    live = {device.mac: device for device in live_devices}
+    # Listed clients that did not answer in time keep their cached entry
+    for mac in cached.keys() - live.keys():
+        if mac in coordinator.websocket_client.client_list:
+            live[mac] = cached[mac]
+    await inventory.async_save(list(live.values()))
+
+    if cached.keys() != live.keys():
+        LOGGER.info(
+            "INIT: Devices changed on the master (added: %s, removed: %s), reloading",
+            sorted(live.keys() - cached.keys()),
+            sorted(cached.keys() - live.keys()),
+        )
+        device_registry = dr.async_get(hass)
+        for mac in cached.keys() - live.keys():
+            if device_entry := device_registry.async_get_device({(DOMAIN, mac)}):
+                device_registry.async_remove_device(device_entry.id)
+        # Not tied to the entry, its background tasks are cancelled on unload
+        hass.async_create_task(hass.config_entries.async_reload(entry.entry_id))
+        return
+
+    coordinator.devices = [
+        device
+        if device.data == live[device.mac].data
+        else device.update(live[device.mac].data)
+        for device in coordinator.devices
+    ]
+    _async_register_devices(hass, entry, coordinator.devices)
+    LOGGER.debug("INIT: Device inventory revalidated")
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -56,11 +160,18 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        await coordinator.async_shutdown()
 
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the cached inventory and data of a deleted config entry."""
+    await EheimDeviceInventory(hass, entry).async_remove()
+    await snapshot_store(hass, entry).async_remove()
+
+
 async def update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Update listener."""
     await hass.config_entries.async_reload(entry.entry_id)
@@ -12,22 +12,32 @@ from homeassistant.components.binary_sensor import (
 )
 
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.typing import StateType
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from homeassistant.helpers.device_registry import format_mac
 
 from . import EheimDigitalDataUpdateCoordinator
+from .capabilities import capabilities_for, entity_unique_id
 from .devices import EheimDevice
-from .const import LOGGER, DOMAIN
+from .const import (
+    ATTR_CIRCUIT_BREAKER,
+    ATTR_DATA_AGE,
+    ATTR_STALE,
+    BREAKER_CLOSED,
+    LOGGER,
+    DOMAIN,
+)
+from .models import EheimMessageData, FilterData, HeaterData, PhData
 
 
 @dataclass
 class EheimBinarySensorDescriptionMixin:
     """Mixin for Eheim binary sensor."""
 
-    value_fn: Callable[[dict[str, Any]], StateType]
+    data_type: type[EheimMessageData]
+    value_fn: Callable[[Any], StateType]
 
 
 @dataclass
@@ -36,7 +46,9 @@ class EheimBinarySensorDescription(
 ):
     """Class describing Eheim binary sensor entities."""
 
-    attr_fn: Callable[[dict[str, Any]], dict[str, StateType]] = lambda _: {}
+    attr_fn: Callable[[Any], dict[str, StateType]] = lambda _: {}
+    # Raw payload fields the binary sensor reads; it is only updated when one changes
+    fields: tuple[str, ...] = ()
 
 
 BINARY_SENSOR_DESCRIPTIONS: tuple[EheimBinarySensorDescription, ...] = (
@@ -46,21 +58,27 @@ BINARY_SENSOR_DESCRIPTIONS: tuple[EheimBinarySensorDescription, ...] = (
         device_class=BinarySensorDeviceClass.HEAT,
         name="Heater Is Heating",
         entity_registry_enabled_default=True,
-        value_fn=lambda data: data.get("isHeating"),
+        data_type=HeaterData,
+        fields=("isHeating",),
+        value_fn=lambda data: data.is_heating,
     ),
     EheimBinarySensorDescription(
         key="heater_alert",
         device_class=BinarySensorDeviceClass.PROBLEM,
         name="Heater Alert",
         entity_registry_enabled_default=True,
-        value_fn=lambda data: data.get("alert_State"),
+        data_type=HeaterData,
+        fields=("alert_State",),
+        value_fn=lambda data: data.alert_state,
     ),
     EheimBinarySensorDescription(
         key="heater_is_active",
         device_class=BinarySensorDeviceClass.RUNNING,
         name="Heater State",
         entity_registry_enabled_default=True,
-        value_fn=lambda data: data.get("active"),
+        data_type=HeaterData,
+        fields=("active",),
+        value_fn=lambda data: data.active,
     ),
     # PH Control Binary Sensors
     EheimBinarySensorDescription(
@@ -68,28 +86,36 @@ BINARY_SENSOR_DESCRIPTIONS: tuple[EheimBinarySensorDescription, ...] = (
         device_class=BinarySensorDeviceClass.RUNNING,
         name="pH Acclimatization",
         entity_registry_enabled_default=True,
-        value_fn=lambda data: data.get("acclimatization"),
+        data_type=PhData,
+        fields=("acclimatization",),
+        value_fn=lambda data: data.acclimatization,
     ),
     EheimBinarySensorDescription(
         key="ph_control_is_active",
         device_class=BinarySensorDeviceClass.RUNNING,
         name="pH Is Active",
         entity_registry_enabled_default=True,
-        value_fn=lambda data: data.get("active"),
+        data_type=PhData,
+        fields=("active",),
+        value_fn=lambda data: data.active,
     ),
     EheimBinarySensorDescription(
         key="ph_control_alert",
         device_class=BinarySensorDeviceClass.PROBLEM,
         name="pH Alert",
         entity_registry_enabled_default=True,
-        value_fn=lambda data: data.get("alertState"),
+        data_type=PhData,
+        fields=("alertState",),
+        value_fn=lambda data: data.alert_state,
     ),
     EheimBinarySensorDescription(
         key="ph_control_is_valve_active",
         device_class=BinarySensorDeviceClass.RUNNING,
         name="pH Valve Is Active",
         entity_registry_enabled_default=True,
-        value_fn=lambda data: data.get("valveIsActive"),
+        data_type=PhData,
+        fields=("valveIsActive",),
+        value_fn=lambda data: data.valve_is_active,
     ),
     # Filter Binary Sensors
     EheimBinarySensorDescription(
@@ -97,22 +123,15 @@ BINARY_SENSOR_DESCRIPTIONS: tuple[EheimBinarySensorDescription, ...] = (
         device_class=BinarySensorDeviceClass.RUNNING,
         name="Filter Is Active",
         entity_registry_enabled_default=True,
-        value_fn=lambda data: data.get("filterActive"),
+        data_type=FilterData,
+        fields=("filterActive",),
+        value_fn=lambda data: data.filter_active,
     ),
 )
 
 
-BINARY_SENSOR_GROUPS = {
-    # Define binary sensor groups similar to SENSOR_GROUPS
-    "heater": ["heater_is_heating", "heater_alert", "heater_is_active"],
-    "ph_control": [
-        "ph_control_acclimatization",
-        "ph_control_is_active",
-        "ph_control_alert",
-        "ph_control_is_valve_active",
-        "ph_control_firmware_update",
-    ],
-    "filter": ["filter_is_active"],
+BINARY_SENSOR_DESCRIPTIONS_BY_KEY = {
+    description.key: description for description in BINARY_SENSOR_DESCRIPTIONS
 }
 
 
@@ -126,18 +145,13 @@ async def async_setup_entry(
 
     binary_sensors = []
     for device in coordinator.devices:
-        device_group = device.device_group
-        binary_sensor_keys_for_group = BINARY_SENSOR_GROUPS.get(device_group, [])
-
-        device_data = _get_binary_sensor_data(coordinator.data, device.mac)
-
-        for description in BINARY_SENSOR_DESCRIPTIONS:
-            if description.key in binary_sensor_keys_for_group:
-                binary_sensors.append(
-                    EheimBinarySensor(coordinator, description, device, device_data)
-                )
+        for key in capabilities_for(device).entities.get(Platform.BINARY_SENSOR, ()):
+            description = BINARY_SENSOR_DESCRIPTIONS_BY_KEY[key]
+            binary_sensors.append(
+                EheimBinarySensor(coordinator, description, device)
+            )
 
-    async_add_entities(binary_sensors, True)
+    async_add_entities(binary_sensors)
 
 
 class EheimBinarySensor(
@@ -153,13 +167,14 @@ class EheimBinarySensor(
         coordinator: EheimDigitalDataUpdateCoordinator,
         description: EheimBinarySensorDescription,
         device: EheimDevice,
-        device_data: dict[str, Any],
     ) -> None:
         """Initialize the BinarySensor."""
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=(device.mac, description.fields))
         self.entity_description = description
-        self._sensor_data = coordinator.data[device.mac]
         self._device = device
+        # The value function failed on the latest data
+        self._value_error = False
+        self._update_value()
         LOGGER.debug(
             "Initializing Eheim BinarySensor for Device: %s Entity: %s",
             self._device.mac,
@@ -167,21 +182,68 @@ class EheimBinarySensor(
         )
 
     @property
-    def is_on(self) -> bool:
-        """Return True if the binary sensor is on."""
-        return bool(self.entity_description.value_fn(self._sensor_data))
+    def available(self) -> bool:
+        """Return True if the device has recently reported the data of this binary sensor."""
+        return (
+            super().available
+            and not self._value_error
+            and self.coordinator.is_data_available(
+                self._device.mac, self.entity_description.data_type.TITLE
+            )
+        )
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Flag restored values and report the state of an unresponsive device."""
+        mac = self._device.mac
+        title = self.entity_description.data_type.TITLE
+        attributes = {}
+        entry = self.coordinator.data.entry(mac, title)
+        if entry is not None and entry.stale:
+            attributes[ATTR_STALE] = True
+        if (age := self.coordinator.data_age(mac, title)) is not None:
+            attributes[ATTR_DATA_AGE] = age
+        breaker = self.coordinator.websocket_client.breaker_state(mac)
+        if breaker != BREAKER_CLOSED:
+            attributes[ATTR_CIRCUIT_BREAKER] = breaker
+        return attributes or None
 
     @property
     def unique_id(self) -> str:
         """Return the unique ID for this binary sensor."""
-        return f"{self._device.model.lower().replace(' ', '_')}_{format_mac(self._device.mac).replace(':','_')}_{self.entity_description.key}"
+        return entity_unique_id(self._device, self.entity_description.key)
 
     @callback
     def _handle_coordinator_update(self) -> None:
         "Handle updated data from the coordinator." ""
-        self._sensor_data = self.coordinator.data[self._device.mac]
+        self._update_value()
         self.async_write_ha_state()
 
+    def _update_value(self) -> None:
+        """Compute the value of the binary sensor once from the latest device data."""
+        data = self.coordinator.data.get_data(
+            self._device.mac, self.entity_description.data_type
+        )
+        if data is None:
+            self._attr_is_on = None
+            self._value_error = False
+            return
+        try:
+            self._attr_is_on = bool(self.entity_description.value_fn(data))
+        except (ArithmeticError, IndexError, TypeError, ValueError) as error:
+            if not self._value_error:
+                LOGGER.warning(
+                    "Could not read %s of device %s from %s: %s",
+                    self.entity_description.key,
+                    self._device.mac,
+                    data,
+                    error,
+                )
+            self._attr_is_on = None
+            self._value_error = True
+        else:
+            self._value_error = False
+
     @property
     def device_info(self):
         return {
@@ -190,22 +252,3 @@ class EheimBinarySensor(
             "manufacturer": "Eheim",
             "model": self._device.model,
         }
-
-
-def _get_binary_sensor_data(sensors: dict[str, Any], mac_address: str) -> Any:
-    """Get the binary sensor data for a sensor type."""
-    if sensors is None:
-        LOGGER.warning(
-            "Binary sensor data is None when trying to fetch %s", mac_address
-        )
-        return None
-
-    # Form the key using device_type and mac_address
-    key = mac_address
-
-    data = sensors.get(key)
-    if data is None:
-        LOGGER.warning("No data found for key: %s", key)
-    else:
-        LOGGER.debug("Received binary sensor data for %s: %s", key, data)
-    return data
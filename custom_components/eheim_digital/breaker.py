@@ -0,0 +1,75 @@
+"""Per-device circuit breaker for EHEIM Digital requests."""
+from __future__ import annotations
+
+from .const import (
+    BREAKER_BACKOFF,
+    BREAKER_CLOSED,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_HALF_OPEN,
+    BREAKER_MAX_BACKOFF,
+    BREAKER_OPEN,
+    LOGGER,
+)
+
+
+class EheimCircuitBreaker:
+    """Stop sending requests to a device that keeps failing.
+
+    After BREAKER_FAILURE_THRESHOLD unanswered requests in a row the breaker
+    opens and requests are rejected. Once the backoff has passed, a single
+    probe request is let through; its failure doubles the backoff up to
+    BREAKER_MAX_BACKOFF. Any frame from the device closes the breaker.
+    """
+
+    __slots__ = ("mac", "state", "failures", "backoff", "retry_at")
+
+    def __init__(self, mac_address: str) -> None:
+        """Initialize a closed breaker for a device."""
+        self.mac = mac_address
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        self.backoff = BREAKER_BACKOFF
+        self.retry_at = 0.0
+
+    def allow_request(self, now: float) -> bool:
+        """Return True if a request to the device may be sent."""
+        if self.state == BREAKER_CLOSED:
+            return True
+        if self.state == BREAKER_OPEN and now >= self.retry_at:
+            LOGGER.debug("BREAKER: Probing device %s", self.mac)
+            self.state = BREAKER_HALF_OPEN
+            return True
+        # Open and backing off, or the probe is still in flight
+        return False
+
+    def record_success(self) -> None:
+        """Close the breaker after the device was heard from."""
+        if self.state != BREAKER_CLOSED:
+            LOGGER.info("BREAKER: Device %s is reachable again", self.mac)
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        self.backoff = BREAKER_BACKOFF
+
+    def abort_probe(self) -> None:
+        """Let the next request probe again after the connection failed the probe."""
+        if self.state == BREAKER_HALF_OPEN:
+            self.state = BREAKER_OPEN
+
+    def record_failure(self, now: float) -> None:
+        """Count a failed request and open the breaker if needed."""
+        if self.state == BREAKER_HALF_OPEN:
+            self.backoff = min(self.backoff * 2, BREAKER_MAX_BACKOFF)
+        elif self.state == BREAKER_CLOSED:
+            self.failures += 1
+            if self.failures < BREAKER_FAILURE_THRESHOLD:
+                return
+            LOGGER.warning(
+                "BREAKER: Pausing requests to device %s after %s failures",
+                self.mac,
+                self.failures,
+            )
+        else:
+            return
+        self.state = BREAKER_OPEN
+        self.retry_at = now + self.backoff
+        LOGGER.debug("BREAKER: Device %s is probed in %s s", self.mac, self.backoff)
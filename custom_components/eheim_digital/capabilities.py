@@ -0,0 +1,169 @@
+"""Requests and entities of each EHEIM Digital device type."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from homeassistant.const import Platform
+from homeassistant.helpers.device_registry import format_mac
+
+from .const import DEVICE_GROUPS, REFRESH_LIVE, REFRESH_ON_CHANGE, REFRESH_PERIODIC
+from .devices import EheimDevice
+from .models import (
+    AcclimationSettings,
+    CloudSettings,
+    ColorChannelValues,
+    EheimMessageData,
+    FilterData,
+    HeaterData,
+    MoonSettings,
+    PhData,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class DataRequest:
+    """A data request, the state its reply carries and the entities reading it."""
+
+    title: str
+    data_type: type[EheimMessageData]
+    tier: str
+    # Entity description keys per platform that read the reply
+    entities: dict[Platform, tuple[str, ...]] = field(default_factory=dict)
+
+
+@dataclass(frozen=True, slots=True)
+class DeviceCapabilities:
+    """The requests of a device type and the entities they feed."""
+
+    requests: tuple[DataRequest, ...] = ()
+    # Entity description keys per platform, in request order
+    entities: dict[Platform, tuple[str, ...]] = field(init=False)
+
+    def __post_init__(self) -> None:
+        """Collect the entity keys of all requests per platform."""
+        entities: dict[Platform, tuple[str, ...]] = {}
+        for request in self.requests:
+            for platform, keys in request.entities.items():
+                entities[platform] = entities.get(platform, ()) + keys
+        object.__setattr__(self, "entities", entities)
+
+
+GROUP_CAPABILITIES: dict[str, DeviceCapabilities] = {
+    "filter": DeviceCapabilities(
+        (
+            DataRequest(
+                "GET_FILTER_DATA",
+                FilterData,
+                REFRESH_LIVE,
+                {
+                    Platform.SENSOR: (
+                        "operating_time",
+                        "night_mode_end_time",
+                        "night_mode_start_time",
+                        "current_speed",
+                        "next_service",
+                        "filter_turn_off_time",
+                    ),
+                    Platform.BINARY_SENSOR: ("filter_is_active",),
+                },
+            ),
+        )
+    ),
+    "heater": DeviceCapabilities(
+        (
+            DataRequest(
+                "GET_EHEATER_DATA",
+                HeaterData,
+                REFRESH_LIVE,
+                {
+                    Platform.SENSOR: ("current_temperature", "target_temperature"),
+                    Platform.BINARY_SENSOR: (
+                        "heater_is_heating",
+                        "heater_alert",
+                        "heater_is_active",
+                    ),
+                },
+            ),
+        )
+    ),
+    "led_control": DeviceCapabilities(
+        (
+            DataRequest(
+                "REQ_CCV",
+                ColorChannelValues,
+                REFRESH_LIVE,
+                {
+                    Platform.SENSOR: (
+                        "ccv_brightness",
+                        "ccv_brightness_white",
+                        "ccv_brightness_plants_gold",
+                        "ccv_brightness_royal_blue",
+                    ),
+                },
+            ),
+            # Read by the light entity, which is only set up with the light
+            # platform; the state its optimistic commands are applied to
+            DataRequest(
+                "GET_ACCL",
+                AcclimationSettings,
+                REFRESH_PERIODIC,
+                {Platform.LIGHT: ("light",)},
+            ),
+            DataRequest(
+                "GET_MOON",
+                MoonSettings,
+                REFRESH_ON_CHANGE,
+                {Platform.LIGHT: ("light",)},
+            ),
+            DataRequest(
+                "GET_CLOUD",
+                CloudSettings,
+                REFRESH_ON_CHANGE,
+                {Platform.LIGHT: ("light",)},
+            ),
+        )
+    ),
+    "ph_control": DeviceCapabilities(
+        (
+            DataRequest(
+                "GET_PH_DATA",
+                PhData,
+                REFRESH_LIVE,
+                {
+                    Platform.SENSOR: (
+                        "ph_current_ph",
+                        "ph_target_ph",
+                        "kH_valve",
+                        "next_ph_service",
+                    ),
+                    Platform.BINARY_SENSOR: (
+                        "ph_control_acclimatization",
+                        "ph_control_is_active",
+                        "ph_control_alert",
+                        "ph_control_is_valve_active",
+                    ),
+                },
+            ),
+        )
+    ),
+}
+
+# Capabilities by device type, resolved once from the device groups
+DEVICE_CAPABILITIES: dict[str, DeviceCapabilities] = {
+    device_type: GROUP_CAPABILITIES[group]
+    for group, device_types in DEVICE_GROUPS.items()
+    if group in GROUP_CAPABILITIES
+    for device_type in device_types
+}
+NO_CAPABILITIES = DeviceCapabilities()
+
+
+def capabilities_for(device: EheimDevice) -> DeviceCapabilities:
+    """Return the capabilities of a device."""
+    return DEVICE_CAPABILITIES.get(device.device_type, NO_CAPABILITIES)
+
+
+def entity_unique_id(device: EheimDevice, key: str) -> str:
+    """Return the unique ID of the entity of a device for a description key."""
+    model = device.model.lower().replace(" ", "_")
+    return f"{model}_{format_mac(device.mac).replace(':', '_')}_{key}"
@@ -0,0 +1,72 @@
+"""JSON codec for EHEIM Digital WebSocket frames."""
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+from .const import LOGGER
+
+
+if orjson is not None:
+
+    def loads(data: str | bytes) -> Any:
+        """Parse a JSON document."""
+        return orjson.loads(data)
+
+    def dumps(obj: Any) -> str:
+        """Serialize an object to a compact JSON string."""
+        return orjson.dumps(obj).decode()
+
+else:
+
+    def loads(data: str | bytes) -> Any:
+        """Parse a JSON document."""
+        return json.loads(data)
+
+    def dumps(obj: Any) -> str:
+        """Serialize an object to a compact JSON string."""
+        return json.dumps(obj, separators=(",", ":"))
+
+
+@dataclass(slots=True)
+class EheimMessage:
+    """A decoded message of an inbound frame."""
+
+    title: str | None
+    sender: str | None
+    payload: dict[str, Any]
+
+
+def decode_frame(frame: str | bytes) -> list[EheimMessage]:
+    """Parse an inbound frame once into its messages.
+
+    The master sends either a single object or a list of objects per frame.
+    """
+    try:
+        document = loads(frame)
+    except ValueError:
+        LOGGER.warning("CODEC: Dropping undecodable frame: %s", frame)
+        return []
+
+    if isinstance(document, dict):
+        document = [document]
+    elif not isinstance(document, list):
+        return []
+    return [
+        EheimMessage(item.get("title"), item.get("from"), item)
+        for item in document
+        if isinstance(item, dict)
+    ]
+
+
+@lru_cache(maxsize=1024)
+def encode_request(title: str, mac_address: str) -> str:
+    """Encode a data request once per (title, MAC) and reuse it."""
+    return dumps({"title": title, "to": mac_address, "from": "USER"})
@@ -0,0 +1,195 @@
+"""Bounded, coalescing queue of the frames sent to the EHEIM Digital master."""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass, field
+
+from .const import (
+    COMMAND_BURST,
+    COMMAND_QUEUE_SIZE,
+    COMMAND_RATE,
+    DROP_NEWEST,
+    DROP_OLDEST,
+    LOGGER,
+    PRIORITY_COMMAND,
+    PRIORITY_POLL,
+)
+
+
+class EheimCommandDroppedError(Exception):
+    """Exception to indicate that a queued frame was dropped."""
+
+
+@dataclass(slots=True)
+class _Entry:
+    """A queued frame and the callers waiting for it to be sent."""
+
+    message: str
+    key: Hashable | None
+    futures: list[asyncio.Future] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class QueueCounters:
+    """Counters of the outbound queue."""
+
+    enqueued: int = 0
+    coalesced: int = 0
+    dropped: int = 0
+    sent: int = 0
+
+
+class EheimCommandQueue:
+    """Send frames in priority order, rate limiting user commands.
+
+    User commands go ahead of poll requests and are sent under a token-bucket
+    rate limit. Poll requests are not, as the in-flight limits of the client
+    already bound them by the replies they wait for. A frame queued with a
+    coalesce key replaces the queued frame with the same key, keeping its
+    place in the queue, so only the newest value is sent. When the queue is
+    full the drop policy either rejects the new frame or drops the oldest
+    frame of the lowest priority.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str], Awaitable[None]],
+        max_size: int = COMMAND_QUEUE_SIZE,
+        rate: float = COMMAND_RATE,
+        burst: int = COMMAND_BURST,
+        drop_policy: str = DROP_OLDEST,
+    ) -> None:
+        """Initialize the queue with the coroutine that writes a frame."""
+        if drop_policy not in (DROP_OLDEST, DROP_NEWEST):
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        self._send = send
+        self._max_size = max_size
+        self._rate = rate
+        self._burst = burst
+        self._drop_policy = drop_policy
+        self._queues: dict[int, deque[_Entry]] = {
+            PRIORITY_COMMAND: deque(),
+            PRIORITY_POLL: deque(),
+        }
+        self._by_key: dict[Hashable, _Entry] = {}
+        self._size = 0
+        self._tokens = float(burst)
+        self._refilled = time.monotonic()
+        self._not_empty = asyncio.Event()
+        self._writer: asyncio.Task | None = None
+        self.counters = QueueCounters()
+
+    def __len__(self) -> int:
+        """Return the number of queued frames."""
+        return self._size
+
+    async def send(
+        self, message: str, priority: int = PRIORITY_POLL, key: Hashable | None = None
+    ) -> None:
+        """Queue a frame and wait until it was written."""
+        future = asyncio.get_running_loop().create_future()
+        if key is not None and (entry := self._by_key.get(key)) is not None:
+            entry.message = message
+            entry.futures.append(future)
+            self.counters.coalesced += 1
+            LOGGER.debug("QUEUE: Coalesced frame %s", message)
+        else:
+            if self._size >= self._max_size:
+                self._drop(message)
+            entry = _Entry(message, key, [future])
+            self._queues[priority].append(entry)
+            if key is not None:
+                self._by_key[key] = entry
+            self._size += 1
+            self._not_empty.set()
+        self.counters.enqueued += 1
+
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._write_frames())
+        await future
+
+    def clear(self) -> None:
+        """Drop every queued frame and stop writing."""
+        if self._writer is not None:
+            self._writer.cancel()
+            self._writer = None
+        for queue in self._queues.values():
+            while queue:
+                self._fail(queue.popleft(), "Outbound queue was cleared")
+        self._by_key.clear()
+        self._size = 0
+        self._not_empty.clear()
+
+    def _drop(self, message: str) -> None:
+        """Make room for a frame according to the drop policy."""
+        self.counters.dropped += 1
+        if self._drop_policy == DROP_NEWEST:
+            LOGGER.warning("QUEUE: Outbound queue is full, rejecting %s", message)
+            raise EheimCommandDroppedError("Outbound queue is full")
+
+        for priority in sorted(self._queues, reverse=True):
+            if queue := self._queues[priority]:
+                entry = queue.popleft()
+                break
+        self._size -= 1
+        if entry.key is not None:
+            del self._by_key[entry.key]
+        LOGGER.warning("QUEUE: Outbound queue is full, dropping %s", entry.message)
+        self._fail(entry, "Dropped from the full outbound queue")
+
+    @staticmethod
+    def _fail(entry: _Entry, reason: str) -> None:
+        """Fail the callers waiting for a frame."""
+        for future in entry.futures:
+            if not future.done():
+                future.set_exception(EheimCommandDroppedError(reason))
+
+    def _next_entry(self) -> _Entry:
+        """Take the oldest frame of the highest priority."""
+        for priority in sorted(self._queues):
+            if queue := self._queues[priority]:
+                entry = queue.popleft()
+                break
+        self._size -= 1
+        if not self._size:
+            self._not_empty.clear()
+        if entry.key is not None:
+            del self._by_key[entry.key]
+        return entry
+
+    async def _acquire_token(self) -> None:
+        """Wait for the token bucket to allow the next frame."""
+        while True:
+            now = time.monotonic()
+            self._tokens = min(
+                self._tokens + (now - self._refilled) * self._rate, self._burst
+            )
+            self._refilled = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self._rate)
+
+    async def _write_frames(self) -> None:
+        """Write the queued frames as the rate limit allows."""
+        while True:
+            await self._not_empty.wait()
+            if self._queues[PRIORITY_COMMAND]:
+                await self._acquire_token()
+            if not self._size:
+                continue
+            entry = self._next_entry()
+            try:
+                await self._send(entry.message)
+            except Exception as ex:  # pylint: disable=broad-except
+                for future in entry.futures:
+                    if not future.done():
+                        future.set_exception(ex)
+                continue
+            self.counters.sent += 1
+            for future in entry.futures:
+                if not future.done():
+                    future.set_result(None)
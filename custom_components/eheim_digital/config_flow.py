@@ -3,7 +3,22 @@ from __future__ import annotations
 import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.const import CONF_IP_ADDRESS
-from .const import DOMAIN, LOGGER
+from homeassistant.core import callback
+from .const import (
+    CONF_DEADBAND,
+    CONF_HEARTBEAT_INTERVAL,
+    CONF_MIN_INTERVAL,
+    CONF_POLL_INTERVALS,
+    CONF_REQUEST_BUDGET,
+    DEFAULT_HEARTBEAT_INTERVAL,
+    DEFAULT_POLL_INTERVALS,
+    DEFAULT_REQUEST_BUDGET,
+    DOMAIN,
+    LOGGER,
+    MAX_POLL_INTERVAL,
+    MIN_POLL_INTERVAL,
+)
+from .sensor import SENSOR_DESCRIPTIONS
 
 from .websocket import (EheimDigitalWebSocketClient,EheimDigitalWebSocketClientCommunicationError)
 
@@ -46,6 +61,14 @@ class EheimDigitalFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             errors=errors,
         )
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> config_entries.OptionsFlow:
+        """Get the options flow for this handler."""
+        return EheimDigitalOptionsFlowHandler(config_entry)
+
     async def _test_host_connection(self, host: str) -> None:
         """Test the connection to the given host."""
         LOGGER.debug("Testing host connection: %s", host)
@@ -55,3 +78,84 @@ class EheimDigitalFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         # Perform other tests here if needed
         await websocket_client.disconnect_websocket()
         LOGGER.debug("Host connection test completed")
+
+
+class EheimDigitalOptionsFlowHandler(config_entries.OptionsFlow):
+    """Options flow for eheim_digital."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize the options flow."""
+        self.config_entry = config_entry
+        self._options: dict = {}
+
+    async def async_step_init(
+        self,
+        user_input: dict | None = None,
+    ) -> config_entries.FlowResult:
+        """Manage the poll intervals and the request budget."""
+        if user_input is not None:
+            LOGGER.debug("Options received: %s", user_input)
+            self._options.update(user_input)
+            return await self.async_step_state_writes()
+
+        options = self.config_entry.options
+        schema = {
+            vol.Required(
+                CONF_POLL_INTERVALS[group],
+                default=options.get(CONF_POLL_INTERVALS[group], interval),
+            ): vol.All(
+                vol.Coerce(int), vol.Range(min=MIN_POLL_INTERVAL, max=MAX_POLL_INTERVAL)
+            )
+            for group, interval in DEFAULT_POLL_INTERVALS.items()
+        }
+        schema[
+            vol.Required(
+                CONF_REQUEST_BUDGET,
+                default=options.get(CONF_REQUEST_BUDGET, DEFAULT_REQUEST_BUDGET),
+            )
+        ] = vol.All(vol.Coerce(int), vol.Range(min=1))
+
+        return self.async_show_form(step_id="init", data_schema=vol.Schema(schema))
+
+    async def async_step_state_writes(
+        self,
+        user_input: dict | None = None,
+    ) -> config_entries.FlowResult:
+        """Manage the deadbands, minimum intervals and heartbeat of sensors."""
+        if user_input is not None:
+            LOGGER.debug("Options received: %s", user_input)
+            self._options.update(user_input)
+            return self.async_create_entry(title="", data=self._options)
+
+        options = self.config_entry.options
+        schema = {}
+        for description in SENSOR_DESCRIPTIONS:
+            if description.deadband is None:
+                continue
+            deadband = CONF_DEADBAND.format(description.key)
+            min_interval = CONF_MIN_INTERVAL.format(description.key)
+            schema[
+                vol.Required(
+                    deadband, default=options.get(deadband, description.deadband)
+                )
+            ] = vol.All(vol.Coerce(float), vol.Range(min=0))
+            schema[
+                vol.Required(
+                    min_interval,
+                    default=options.get(min_interval, description.min_interval),
+                )
+            ] = vol.All(vol.Coerce(int), vol.Range(min=0, max=MAX_POLL_INTERVAL))
+        schema[
+            vol.Required(
+                CONF_HEARTBEAT_INTERVAL,
+                default=options.get(
+                    CONF_HEARTBEAT_INTERVAL, DEFAULT_HEARTBEAT_INTERVAL
+                ),
+            )
+        ] = vol.All(
+            vol.Coerce(int), vol.Range(min=MIN_POLL_INTERVAL, max=MAX_POLL_INTERVAL)
+        )
+
+        return self.async_show_form(
+            step_id="state_writes", data_schema=vol.Schema(schema)
+        )
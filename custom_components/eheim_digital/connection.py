@@ -0,0 +1,269 @@
+"""Connection manager for the WebSocket to the EHEIM Digital master."""
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import websockets
+from async_timeout import timeout
+
+from .codec import EheimMessage, decode_frame, dumps
+from .const import (
+    CONNECTION_BACKOFF,
+    CONNECTION_CONNECTING,
+    CONNECTION_DEGRADED,
+    CONNECTION_DISCONNECTED,
+    CONNECTION_HANDSHAKING,
+    CONNECTION_READY,
+    DEGRADED_AFTER_TIMEOUTS,
+    HANDSHAKE_FRAMES,
+    HANDSHAKE_TIMEOUT,
+    KEEP_ALIVE_REPLY,
+    KEEP_ALIVE_REQUEST,
+    LOGGER,
+    PING_INTERVAL,
+    PING_TIMEOUT,
+    RECONNECT_BASE_DELAY,
+    RECONNECT_MAX_DELAY,
+)
+
+
+class EheimConnectionError(Exception):
+    """Exception to indicate that the connection could not be established."""
+
+
+@dataclass(slots=True)
+class ConnectionMetrics:
+    """Reconnect and downtime counters of a connection."""
+
+    reconnect_count: int = 0
+    failed_attempts: int = 0
+    downtime: float = 0.0
+    connected_since: float | None = None
+    disconnected_since: float | None = None
+
+    def current_downtime(self, now: float) -> float:
+        """Return the total downtime including the current outage."""
+        if self.disconnected_since is None:
+            return self.downtime
+        return self.downtime + now - self.disconnected_since
+
+
+class EheimConnectionManager:
+    """Keep the WebSocket to the master open.
+
+    The connection moves through connecting, handshaking and ready. Requests
+    are allowed while it is ready or degraded, that is ready but with requests
+    to DEGRADED_AFTER_TIMEOUTS devices unanswered in a row. A lost connection
+    goes to backoff and is reconnected with jittered exponential backoff for
+    as long as the manager runs.
+
+    Liveness is checked with WebSocket pings; a pong missing for
+    ping_timeout seconds closes the connection. Keep-alive requests of the
+    master are answered by the reader without going through the requests.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        on_handshake: Callable[[list[EheimMessage]], None],
+        on_message: Callable[[EheimMessage], None],
+        on_disconnect: Callable[[], None],
+        ping_interval: float | None = PING_INTERVAL,
+        ping_timeout: float | None = PING_TIMEOUT,
+    ) -> None:
+        """Initialize the manager with the callbacks for inbound frames."""
+        self._url = url
+        self._ping_interval = ping_interval
+        self._ping_timeout = ping_timeout
+        self._on_handshake = on_handshake
+        self._on_message = on_message
+        self._on_disconnect = on_disconnect
+        self._websocket = None
+        self._lock = asyncio.Lock()
+        self._reader_task: asyncio.Task | None = None
+        self._supervisor: asyncio.Task | None = None
+        self._ready = asyncio.Event()
+        # Targets of the requests unanswered since the last inbound frame
+        self._timed_out: set[str] = set()
+        self.state = CONNECTION_DISCONNECTED
+        self.metrics = ConnectionMetrics()
+
+    @property
+    def is_ready(self) -> bool:
+        """Return True if requests can be sent."""
+        return self.state in (CONNECTION_READY, CONNECTION_DEGRADED)
+
+    def _set_state(self, state: str) -> None:
+        """Move to a new connection state."""
+        if state != self.state:
+            LOGGER.debug("CONNECTION: %s -> %s", self.state, state)
+            self.state = state
+        if self.is_ready:
+            self._ready.set()
+        else:
+            self._ready.clear()
+
+    async def connect(self) -> None:
+        """Connect now and keep the connection open from then on."""
+        await self._connect()
+        self.start()
+
+    def start(self) -> None:
+        """Keep the connection open in the background."""
+        if self._supervisor is None or self._supervisor.done():
+            self._supervisor = asyncio.create_task(self._maintain())
+
+    async def stop(self) -> None:
+        """Close the connection and stop reconnecting."""
+        for task in (self._supervisor, self._reader_task):
+            if task is not None:
+                task.cancel()
+        self._supervisor = self._reader_task = None
+        async with self._lock:
+            if self._websocket is not None:
+                await self._websocket.close()
+                self._websocket = None
+            self._set_state(CONNECTION_DISCONNECTED)
+
+    async def wait_ready(self, timeout: float) -> bool:
+        """Wait until requests can be sent, at most timeout seconds."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def send(self, message: str) -> None:
+        """Send a text frame."""
+        if not self.is_ready:
+            raise EheimConnectionError(f"WebSocket is {self.state}")
+        await self._websocket.send(message)
+
+    def record_timeout(self, target: str) -> None:
+        """Count a request to a device that was not answered."""
+        self._timed_out.add(target)
+        if (
+            self.state == CONNECTION_READY
+            and len(self._timed_out) >= DEGRADED_AFTER_TIMEOUTS
+        ):
+            LOGGER.warning(
+                "CONNECTION: Requests to %s devices in a row were not answered",
+                len(self._timed_out),
+            )
+            self._set_state(CONNECTION_DEGRADED)
+
+    async def _connect(self) -> None:
+        """Open the WebSocket and run the handshake."""
+        async with self._lock:  # Ensure only one connection attempt at a time
+            if self.is_ready:  # Connected while waiting for the lock
+                return
+            self._set_state(CONNECTION_CONNECTING)
+            websocket = None
+            try:
+                websocket = await websockets.connect(
+                    self._url,
+                    subprotocols=["arduino"],
+                    ping_interval=self._ping_interval,
+                    ping_timeout=self._ping_timeout,
+                )  # pylint: disable=all
+                self._set_state(CONNECTION_HANDSHAKING)
+                messages = []
+                # A master that accepts the socket but stays silent is retried
+                try:
+                    async with timeout(HANDSHAKE_TIMEOUT):
+                        for _ in range(HANDSHAKE_FRAMES):
+                            frame = await websocket.recv()
+                            LOGGER.debug("CONNECTION: Handshake frame: %s", frame)
+                            messages.extend(decode_frame(frame))
+                except asyncio.TimeoutError as ex:
+                    raise EheimConnectionError(
+                        f"No handshake within {HANDSHAKE_TIMEOUT} s"
+                    ) from ex
+            except Exception as ex:
+                if websocket is not None:
+                    await websocket.close()
+                self.metrics.failed_attempts += 1
+                self._set_state(CONNECTION_BACKOFF)
+                raise EheimConnectionError(
+                    f"Failed to connect to WebSocket: {ex}"
+                ) from ex
+
+            self._on_handshake(messages)
+            # Only a connection that finished its handshake is used
+            self._websocket = websocket
+            self._timed_out.clear()
+            now = time.monotonic()
+            if self.metrics.disconnected_since is not None:
+                self.metrics.reconnect_count += 1
+                self.metrics.downtime += now - self.metrics.disconnected_since
+                self.metrics.disconnected_since = None
+            self.metrics.connected_since = now
+            self._set_state(CONNECTION_READY)
+            # Everything after the handshake is consumed by the reader task
+            self._reader_task = asyncio.create_task(self._read_messages(websocket))
+
+    async def _read_messages(self, websocket) -> None:
+        """Read every inbound frame and hand its messages to the client."""
+        LOGGER.debug("CONNECTION: Reader task started")
+        try:
+            async for frame in websocket:
+                if self.state == CONNECTION_DEGRADED:
+                    self._set_state(CONNECTION_READY)
+                self._timed_out.clear()
+                for message in decode_frame(frame):
+                    if message.title == KEEP_ALIVE_REQUEST:
+                        await self._answer_keep_alive(websocket, message)
+                    self._on_message(message)
+        except websockets.ConnectionClosed as ex:
+            LOGGER.warning("CONNECTION: Connection closed: %s", ex)
+        except Exception:  # pylint: disable=broad-except
+            # Without a reader nothing is received, so start over
+            LOGGER.exception("CONNECTION: Reader failed, reconnecting")
+            await websocket.close()
+        finally:
+            if self._websocket is websocket:
+                self._websocket = None
+                self.metrics.connected_since = None
+                self.metrics.disconnected_since = time.monotonic()
+                self._set_state(CONNECTION_BACKOFF)
+            self._on_disconnect()
+            LOGGER.debug("CONNECTION: Reader task stopped")
+
+    async def _answer_keep_alive(self, websocket, message: EheimMessage) -> None:
+        """Answer a keep-alive request of the master."""
+        reply = {
+            "title": KEEP_ALIVE_REPLY,
+            "to": message.sender or "MASTER",
+            "from": "USER",
+        }
+        await websocket.send(dumps(reply))
+        LOGGER.debug("CONNECTION: Answered keep-alive of %s", reply["to"])
+
+    async def _maintain(self) -> None:
+        """Reconnect whenever the connection is lost."""
+        attempt = 0
+        while True:
+            if self._reader_task is not None and self.is_ready:
+                await asyncio.wait({self._reader_task})
+                attempt = 0
+                continue
+
+            # The first attempt after a loss is immediate
+            if attempt:
+                delay = min(
+                    RECONNECT_BASE_DELAY * 2 ** (attempt - 1), RECONNECT_MAX_DELAY
+                ) * random.uniform(0.5, 1)
+                self._set_state(CONNECTION_BACKOFF)
+                LOGGER.debug("CONNECTION: Reconnecting in %.1f s", delay)
+                await asyncio.sleep(delay)
+            attempt += 1
+            try:
+                await self._connect()
+            except EheimConnectionError as ex:
+                LOGGER.warning("CONNECTION: Attempt %s failed: %s", attempt, ex)
+            else:
+                LOGGER.info("CONNECTION: Connected after %s attempts", attempt)
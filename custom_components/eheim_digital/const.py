@@ -6,7 +6,69 @@ LOGGER: Logger = getLogger(__package__)
 NAME = "EHEIM Digital"
 DOMAIN = "eheim_digital"
 VERSION = "0.0.1"
-UPDATE_INTERVAL = 30
+STORAGE_VERSION = 1
+# The discovered device inventory per config entry, used to set up entities
+# before the master has answered
+INVENTORY_STORAGE_KEY = f"{DOMAIN}.inventory"
+# The last known device data per config entry, restored as stale on startup
+SNAPSHOT_STORAGE_KEY = f"{DOMAIN}.snapshot"
+SNAPSHOT_SAVE_DELAY = 60
+ATTR_STALE = "stale"
+ATTR_DATA_AGE = "data_age"
+ATTR_CIRCUIT_BREAKER = "circuit_breaker"
+# Live state is pushed by the master, polling is only a safety net. The
+# coordinator ticks every UPDATE_INTERVAL seconds and polls the devices whose
+# adaptive per-group interval is due.
+UPDATE_INTERVAL = 5
+CONF_REQUEST_BUDGET = "request_budget"
+DEFAULT_REQUEST_BUDGET = 60  # Requests per minute sent to the master
+DEFAULT_POLL_INTERVALS = {
+    "filter": 120,
+    "heater": 300,
+    "led_control": 60,
+    "ph_control": 300,
+}
+CONF_POLL_INTERVALS = {group: f"{group}_interval" for group in DEFAULT_POLL_INTERVALS}
+MIN_POLL_INTERVAL = 10
+MAX_POLL_INTERVAL = 3600
+# Poll at up to this multiple of the group interval while readings are stable
+MAX_POLL_BACKOFF = 4
+STABLE_POLLS_BEFORE_BACKOFF = 3
+# Raw fields whose change shortens the poll interval of a group: setpoints,
+# modes and alerts. Counters and noisy readings move on every poll and are
+# left out, as are channel values that ramp with the light schedule.
+POLL_SIGNIFICANT_FIELDS = {
+    "filter": {
+        "filterActive",
+        "maxFreqRglOff",
+        "turnOffTime",
+        "start_time_night_mode",
+        "end_time_night_mode",
+    },
+    "heater": {"sollTemp", "alert_State", "active"},
+    "led_control": {"acclActive", "pause", "moonlightActive", "cloudActive"},
+    "ph_control": {
+        "sollPH",
+        "kH",
+        "dayStartT",
+        "nightStartT",
+        "acclimatization",
+        "active",
+        "alertState",
+    },
+}
+
+# Sensors with a deadband write a new state only once their value moved by at
+# least the deadband and min_interval seconds passed since the last write. The
+# latest state is written every heartbeat interval regardless.
+CONF_DEADBAND = "{}_deadband"
+CONF_MIN_INTERVAL = "{}_min_interval"
+CONF_HEARTBEAT_INTERVAL = "heartbeat_interval"
+DEFAULT_HEARTBEAT_INTERVAL = 900
+
+# Fetch devices concurrently during an update cycle, at most this many at once
+CONCURRENT_UPDATES = True
+MAX_CONCURRENT_DEVICE_UPDATES = 8
 PLATFORMS = ["sensor", "binary_sensor"]  # ["sensor", "binary_sensor", "light"]
 
 DEVICE_TYPES = {
@@ -63,6 +125,120 @@ DEVICE_GROUPS = {
     ],
 }
 
+# Request titles and the titles of the frames the devices answer with
+RESPONSE_TITLES = {
+    "GET_USRDTA": "USRDTA",
+    "GET_MESH_NETWORK": "MESH_NETWORK",
+    "GET_FILTER_DATA": "FILTER_DATA",
+    "GET_EHEATER_DATA": "HEATER_DATA",
+    "GET_PH_DATA": "PH_DATA",
+    "REQ_CCV": "CCV",
+    "GET_ACCL": "ACCLIMATE",
+    "GET_DYCL": "DYCL",
+    "GET_MOON": "MOON",
+    "GET_CLOUD": "CLOUD",
+    "GET_DSCRPTN": "DSCRPTN",
+}
+
+# Titles of frames that carry device state and are routed into the coordinator
+DEVICE_DATA_TITLES = {
+    "FILTER_DATA",
+    "HEATER_DATA",
+    "PH_DATA",
+    "CCV",
+    "ACCLIMATE",
+    "DYCL",
+    "MOON",
+    "CLOUD",
+    "DSCRPTN",
+}
+
+KEEP_ALIVE_TITLES = {"REQ_KEEP_ALIVE", "KEEP_ALIVE"}
+# The master asks with REQ_KEEP_ALIVE and drops clients that do not answer
+KEEP_ALIVE_REQUEST = "REQ_KEEP_ALIVE"
+KEEP_ALIVE_REPLY = "KEEP_ALIVE"
+
+# Refresh tiers of the device data requests: live readings are fetched every
+# cycle, settings are served from a cache until their TTL expires or they change
+REFRESH_LIVE = "live"
+REFRESH_PERIODIC = "periodic"
+REFRESH_ON_CHANGE = "on_change"
+REFRESH_TIER_TTL = {
+    REFRESH_LIVE: 0,
+    REFRESH_PERIODIC: 3600,
+    REFRESH_ON_CHANGE: 86400,
+}
+
+# Commands and the request whose cached response they invalidate
+COMMAND_INVALIDATES = {
+    "ACCLIMATE": "GET_ACCL",
+    "SET_MOON": "GET_MOON",
+    "MOON": "GET_MOON",
+    "CLOUD": "GET_CLOUD",
+    "DYCL": "GET_DYCL",
+}
+
+# Maximum number of requests awaiting a reply on the connection and per device
+MAX_IN_FLIGHT_REQUESTS = 16
+MAX_IN_FLIGHT_PER_DEVICE = 4
+# Outbound frames are queued, user commands ahead of poll requests. Commands
+# are sent at up to COMMAND_RATE frames per second with bursts of
+# COMMAND_BURST; requests are bounded by the in-flight limits above instead.
+# A full queue drops the oldest poll request or rejects the new frame.
+COMMAND_QUEUE_SIZE = 64
+COMMAND_RATE = 20
+COMMAND_BURST = 10
+PRIORITY_COMMAND = 0
+PRIORITY_POLL = 1
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+# Commands of which only the newest queued frame per device is sent
+COALESCED_COMMANDS = {"CCV-SW", "SET_MOON", "MOON", "CLOUD", "ACCLIMATE"}
+# Seconds discovery waits for the USRDTA replies of all clients
+DISCOVERY_TIMEOUT = 10
+# Seconds a request waits for its reply and an update cycle waits for all devices
+REQUEST_TIMEOUT = 5
+UPDATE_CYCLE_TIMEOUT = 20
+# Seconds a reply is reused for an identical request
+REPLY_REUSE_WINDOW = 0.3
+# Seconds the last value of an unresponsive device is still shown
+STALE_DATA_MAX_AGE = 600
+# Seconds the state expected after a command is shown without the device
+# confirming it before it is rolled back
+OPTIMISTIC_CONFIRM_TIMEOUT = 5
+
+# Connection states and reconnect backoff in seconds
+CONNECTION_DISCONNECTED = "disconnected"
+CONNECTION_CONNECTING = "connecting"
+CONNECTION_HANDSHAKING = "handshaking"
+CONNECTION_READY = "ready"
+CONNECTION_DEGRADED = "degraded"
+CONNECTION_BACKOFF = "backoff"
+HANDSHAKE_FRAMES = 2
+# Seconds the master has to send the handshake frames of a new connection
+HANDSHAKE_TIMEOUT = 10
+# Seconds between WebSocket pings and until a missing pong closes the connection
+PING_INTERVAL = 20
+PING_TIMEOUT = 10
+# Seconds between GET_MESH_NETWORK topology refreshes
+TOPOLOGY_REFRESH_INTERVAL = 3600
+# Seconds the background first refresh waits for the connection
+FIRST_REFRESH_CONNECT_TIMEOUT = 30
+RECONNECT_BASE_DELAY = 1
+RECONNECT_MAX_DELAY = 300
+# Devices with unanswered requests, with no frame received in between, before
+# the connection counts as degraded; one dead device does not degrade it
+DEGRADED_AFTER_TIMEOUTS = 3
+
+# Per-device circuit breaker: consecutive failures before requests to a device
+# are paused, and the seconds until it is probed again
+BREAKER_FAILURE_THRESHOLD = 3
+BREAKER_BACKOFF = 30
+BREAKER_MAX_BACKOFF = 900
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
 # Cansiter filter pump modes
 FILTER_PUMP_MODES = {
     "PM_NORMAL": 1,
@@ -1,18 +1,62 @@
 """Eheim Digital DataUpdateCoordinator."""
 from __future__ import annotations
+import asyncio
+import time
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
 from datetime import timedelta
+from functools import partial
 from typing import Any
 from async_timeout import timeout
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
-from .const import DOMAIN, LOGGER, UPDATE_INTERVAL
-from .websocket import EheimDigitalWebSocketClient
+from .const import (
+    CONCURRENT_UPDATES,
+    CONF_POLL_INTERVALS,
+    CONF_REQUEST_BUDGET,
+    DEFAULT_POLL_INTERVALS,
+    DEFAULT_REQUEST_BUDGET,
+    DEVICE_DATA_TITLES,
+    DOMAIN,
+    LOGGER,
+    MAX_CONCURRENT_DEVICE_UPDATES,
+    OPTIMISTIC_CONFIRM_TIMEOUT,
+    PLATFORMS,
+    POLL_SIGNIFICANT_FIELDS,
+    REFRESH_LIVE,
+    SNAPSHOT_SAVE_DELAY,
+    SNAPSHOT_STORAGE_KEY,
+    STALE_DATA_MAX_AGE,
+    STORAGE_VERSION,
+    TOPOLOGY_REFRESH_INTERVAL,
+    UPDATE_CYCLE_TIMEOUT,
+    UPDATE_INTERVAL,
+)
+from .capabilities import (
+    GROUP_CAPABILITIES,
+    DataRequest,
+    capabilities_for,
+    entity_unique_id,
+)
+from .codec import EheimMessage
+from .devices import EheimDevice
+from .models import EheimStateStore
+from .scheduler import EheimPollScheduler
+from .websocket import EheimDigitalWebSocketClient, EheimDigitalWebSocketClientError
 
 
-class EheimDigitalDataUpdateCoordinator(DataUpdateCoordinator[dict[str, Any]]):
+def snapshot_store(hass: HomeAssistant, entry: ConfigEntry) -> Store:
+    """Return the store of the last known device data of a config entry."""
+    return Store(hass, STORAGE_VERSION, f"{SNAPSHOT_STORAGE_KEY}.{entry.entry_id}")
+
+
+class EheimDigitalDataUpdateCoordinator(DataUpdateCoordinator[EheimStateStore]):
     """Class to manage fetching EHEIM Digital data."""
 
     def __init__(
@@ -26,33 +70,538 @@ class EheimDigitalDataUpdateCoordinator(DataUpdateCoordinator[dict[str, Any]]):
         self.entry = entry
         update_interval = timedelta(seconds=UPDATE_INTERVAL)
         self.devices = []
+        self.store = EheimStateStore()
+        self._snapshot = snapshot_store(hass, entry)
+        self.concurrent_updates = CONCURRENT_UPDATES
+        self.last_update_duration: float | None = None
+        # MACs of the devices that did not answer their last poll
+        self.unavailable_devices: set[str] = set()
+        self._update_semaphore = asyncio.Semaphore(MAX_CONCURRENT_DEVICE_UPDATES)
+        # (MAC, raw field) pairs changed since listeners were last notified
+        self._changed_fields: set[tuple[str, str]] = set()
+        self._field_index: dict[tuple[str, str], list[CALLBACK_TYPE]] | None = None
+        self._unindexed_listeners: list[CALLBACK_TYPE] = []
+        self._notified_success: bool | None = None
+        # Rollback timers of unconfirmed optimistic state keyed by (MAC, title)
+        self._confirm_timers: dict[tuple[str, str], CALLBACK_TYPE] = {}
+        # Requests with an enabled consumer per MAC, rebuilt on registry changes
+        self._request_plans: dict[str, tuple[DataRequest, ...]] = {}
+        self.scheduler = EheimPollScheduler(
+            {
+                group: entry.options.get(CONF_POLL_INTERVALS[group], interval)
+                for group, interval in DEFAULT_POLL_INTERVALS.items()
+            },
+            {
+                group: sum(
+                    request.tier == REFRESH_LIVE for request in capabilities.requests
+                )
+                for group, capabilities in GROUP_CAPABILITIES.items()
+            },
+            entry.options.get(CONF_REQUEST_BUDGET, DEFAULT_REQUEST_BUDGET),
+        )
 
         super().__init__(hass, LOGGER, name=DOMAIN, update_interval=update_interval)
         # hass.async_create_task(self._async_update_data())
+        self._unsub_push = websocket_client.add_listener(self._handle_push_message)
+        self._unsub_topology = async_track_time_interval(
+            hass,
+            self._async_refresh_topology,
+            timedelta(seconds=TOPOLOGY_REFRESH_INTERVAL),
+        )
+        self._unsub_registry = hass.bus.async_listen(
+            er.EVENT_ENTITY_REGISTRY_UPDATED, self._handle_registry_update
+        )
+
+    async def _async_refresh_topology(self, _now=None) -> None:
+        """Check which clients the master still lists in its mesh network."""
+        if not self.websocket_client.is_connected:
+            return
+        try:
+            clients = await self.websocket_client.refresh_topology()
+        except EheimDigitalWebSocketClientError as error:
+            LOGGER.debug("COORDINATOR: Topology refresh failed: %s", error)
+            return
+        known = {device.mac for device in self.devices}
+        if missing := known.difference(clients):
+            LOGGER.info("COORDINATOR: Devices left the mesh: %s", sorted(missing))
+        if added := set(clients).difference(known):
+            LOGGER.info("COORDINATOR: New devices in the mesh: %s", sorted(added))
+
+    @callback
+    def _handle_push_message(self, message: EheimMessage) -> None:
+        """Merge a frame pushed by the master into the device data."""
+        mac = message.sender
+        if (
+            self.data is None
+            or mac not in self.store
+            or message.title not in DEVICE_DATA_TITLES
+        ):
+            return
+
+        LOGGER.debug("COORDINATOR: Pushed data for device %s: %s", mac, message)
+        self._set_device_available(mac)
+        self._store_responses(mac, [message.payload])
+        # Notify only; the poll timer and the outcome of the last poll are kept
+        self.async_update_listeners()
+
+    @callback
+    def async_add_listener(
+        self, update_callback: CALLBACK_TYPE, context: Any = None
+    ) -> Callable[[], None]:
+        """Listen for data updates.
+
+        A context of (MAC, raw fields) limits the listener to updates that
+        change one of those fields.
+        """
+        remove = super().async_add_listener(update_callback, context)
+        self._field_index = None
+
+        @callback
+        def remove_listener() -> None:
+            remove()
+            self._field_index = None
+
+        return remove_listener
+
+    def _build_field_index(self) -> dict[tuple[str, str], list[CALLBACK_TYPE]]:
+        """Index the listeners by the (MAC, raw field) pairs they depend on."""
+        index: defaultdict[tuple[str, str], list[CALLBACK_TYPE]] = defaultdict(list)
+        self._unindexed_listeners = []
+        for update_callback, context in self._listeners.values():
+            if context is None:
+                self._unindexed_listeners.append(update_callback)
+                continue
+            mac, fields = context
+            for field in fields:
+                index[(mac, field)].append(update_callback)
+        return dict(index)
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update the listeners whose fields changed since the last update.
+
+        All listeners are updated when the availability of the coordinator
+        changed.
+        """
+        changed, self._changed_fields = self._changed_fields, set()
+        if self.last_update_success != self._notified_success:
+            self._notified_success = self.last_update_success
+            super().async_update_listeners()
+            return
+
+        if self._field_index is None:
+            self._field_index = self._build_field_index()
+        update_callbacks = dict.fromkeys(self._unindexed_listeners)
+        for key in changed:
+            update_callbacks.update(dict.fromkeys(self._field_index.get(key, ())))
+        for update_callback in update_callbacks:
+            update_callback()
+
+    async def async_shutdown(self) -> None:
+        """Stop listening for pushed frames and close the WebSocket."""
+        await super().async_shutdown()
+        # Also runs from the config entry's unload callbacks, so only once
+        if self._unsub_push is not None:
+            self._unsub_push()
+            self._unsub_push = None
+            self._unsub_topology()
+            self._unsub_registry()
+            for cancel in self._confirm_timers.values():
+                cancel()
+            self._confirm_timers.clear()
+            await self.websocket_client.disconnect_websocket()
+
+    @callback
+    def _handle_registry_update(self, event: Event) -> None:
+        """Rebuild the request plans when entities are added, removed or toggled."""
+        if event.data["action"] != "update" or "disabled_by" in event.data.get(
+            "changes", {}
+        ):
+            self._request_plans.clear()
+
+    def _request_plan(self, device: EheimDevice) -> tuple[DataRequest, ...]:
+        """Return the requests of a device that an enabled entity reads.
+
+        Entities not in the entity registry yet count as enabled, entities of
+        platforms that are not set up as disabled.
+        """
+        if (plan := self._request_plans.get(device.mac)) is not None:
+            return plan
+        registry = er.async_get(self.hass)
+        plan = tuple(
+            request
+            for request in capabilities_for(device).requests
+            if _has_enabled_entity(registry, device, request)
+        )
+        if skipped := len(capabilities_for(device).requests) - len(plan):
+            LOGGER.debug(
+                "COORDINATOR: Skipping %s requests of %s without enabled entities",
+                skipped,
+                device.mac,
+            )
+        self._request_plans[device.mac] = plan
+        return plan
+
+    async def async_turn_light_on(self, mac_address: str) -> None:
+        """Turn a light on."""
+        await self._async_send_command(
+            mac_address,
+            "CCV",
+            {"currentValues": [100, 100, 100]},
+            self.websocket_client.turn_light_on,
+        )
+
+    async def async_turn_light_off(self, mac_address: str) -> None:
+        """Turn a light off."""
+        await self._async_send_command(
+            mac_address,
+            "CCV",
+            {"currentValues": [0, 0, 0]},
+            self.websocket_client.turn_light_off,
+        )
+
+    async def async_set_color_channel_values(
+        self, mac_address: str, current_values: list[int]
+    ) -> None:
+        """Set the color channel values of a light."""
+        await self._async_send_command(
+            mac_address,
+            "CCV",
+            {"currentValues": current_values},
+            self.websocket_client.set_color_channel_values,
+            current_values,
+        )
+
+    async def async_set_acclimation_settings(
+        self,
+        mac_address: str,
+        duration: int,
+        intensity_reduction: int,
+        current_accl_day: int,
+        accl_active: bool,
+        accl_pause: bool,
+    ) -> None:
+        """Set the acclimation settings of a light."""
+        await self._async_send_command(
+            mac_address,
+            "ACCLIMATE",
+            {
+                "duration": duration,
+                "intensityReduction": intensity_reduction,
+                "currentAcclDay": current_accl_day,
+                "acclActive": accl_active,
+                "pause": accl_pause,
+            },
+            self.websocket_client.set_acclimation_settings,
+            duration,
+            intensity_reduction,
+            current_accl_day,
+            accl_active,
+            accl_pause,
+        )
+
+    async def async_set_moonlight_settings(
+        self,
+        mac_address: str,
+        min_moonlight: int,
+        max_moonlight: int,
+        moonlight_active: bool,
+        moonlight_cycle: bool,
+        moon_color: int,
+    ) -> None:
+        """Set the moonlight settings of a light."""
+        await self._async_send_command(
+            mac_address,
+            "MOON",
+            {
+                "minmoonlight": min_moonlight,
+                "maxmoonlight": max_moonlight,
+                "moonlightActive": moonlight_active,
+                "moonlightCycle": moonlight_cycle,
+            },
+            self.websocket_client.set_moonlight_settings,
+            min_moonlight,
+            max_moonlight,
+            moonlight_active,
+            moonlight_cycle,
+            moon_color,
+        )
+
+    async def async_set_cloud_settings(
+        self,
+        mac_address: str,
+        probability: int,
+        max_amount: int,
+        min_intensity: int,
+        max_intensity: int,
+        min_duration: int,
+        max_duration: int,
+        cloud_active: bool,
+    ) -> None:
+        """Set the cloud simulation settings of a light."""
+        await self._async_send_command(
+            mac_address,
+            "CLOUD",
+            {
+                "probability": probability,
+                "maxAmount": max_amount,
+                "minIntensity": min_intensity,
+                "maxIntensity": max_intensity,
+                "minDuration": min_duration,
+                "maxDuration": max_duration,
+                "cloudActive": cloud_active,
+            },
+            self.websocket_client.set_cloud_settings,
+            probability,
+            max_amount,
+            min_intensity,
+            max_intensity,
+            min_duration,
+            max_duration,
+            cloud_active,
+        )
+
+    async def _async_send_command(
+        self,
+        mac_address: str,
+        title: str,
+        fields: dict[str, Any],
+        command: Callable[..., Awaitable[Any]],
+        *args: Any,
+    ) -> None:
+        """Send a command and show the state it is expected to cause right away.
+
+        The optimistic state is confirmed by a frame of the title that reports
+        the same fields, or rolled back to the latest state of the device if
+        the command fails or no such frame arrives within
+        OPTIMISTIC_CONFIRM_TIMEOUT seconds.
+        """
+        changed = self.store.apply_optimistic(mac_address, title, fields)
+        self._changed_fields.update((mac_address, field) for field in changed)
+        key = (mac_address, title)
+        if cancel := self._confirm_timers.pop(key, None):
+            cancel()
+        self._confirm_timers[key] = async_call_later(
+            self.hass,
+            OPTIMISTIC_CONFIRM_TIMEOUT,
+            partial(self._async_confirm_timeout, mac_address, title),
+        )
+        self.async_update_listeners()
+
+        try:
+            await command(mac_address, *args)
+        except EheimDigitalWebSocketClientError:
+            self._async_rollback(mac_address, title)
+            raise
+
+    @callback
+    def _async_confirm_timeout(self, mac_address: str, title: str, _now) -> None:
+        """Roll back optimistic state the device did not confirm in time."""
+        self._confirm_timers.pop((mac_address, title), None)
+        LOGGER.debug(
+            "COORDINATOR: Device %s did not confirm its %s state", mac_address, title
+        )
+        self._async_rollback(mac_address, title)
+
+    @callback
+    def _async_rollback(self, mac_address: str, title: str) -> None:
+        """Restore the state replaced by unconfirmed optimistic state."""
+        if cancel := self._confirm_timers.pop((mac_address, title), None):
+            cancel()
+        changed = self.store.rollback(mac_address, title)
+        if changed:
+            self._changed_fields.update((mac_address, field) for field in changed)
+            self.async_update_listeners()
 
-    async def _async_update_data(self) -> dict[str, Any]:
-        """Update data via Websocket."""
-        all_device_data = {}
+    async def async_restore_snapshot(self) -> bool:
+        """Fill the store with the data saved in the last session.
+
+        Returns False if there is no snapshot of the current devices.
+        """
+        if not (snapshot := await self._snapshot.async_load()):
+            return False
+        macs = {device.mac for device in self.devices}
+        snapshot = {mac: data for mac, data in snapshot.items() if mac in macs}
+        if not snapshot:
+            return False
+        self.store.restore(snapshot)
+        LOGGER.debug("COORDINATOR: Restored stale data of %s devices", len(snapshot))
+        return True
+
+    def is_data_available(self, mac_address: str, title: str) -> bool:
+        """Return True if the data of a device is fresh enough to be shown.
+
+        The last value of a device that stopped answering is shown for up to
+        STALE_DATA_MAX_AGE seconds.
+        """
+        if (entry := self.store.entry(mac_address, title)) is None:
+            return False
+        if mac_address not in self.unavailable_devices:
+            return True
+        return time.time() - entry.received <= STALE_DATA_MAX_AGE
+
+    def data_age(self, mac_address: str, title: str) -> int | None:
+        """Return the age in seconds of the data of an unresponsive device."""
+        if mac_address not in self.unavailable_devices:
+            return None
+        if (entry := self.store.entry(mac_address, title)) is None:
+            return None
+        return round(time.time() - entry.received)
+
+    async def _async_update_data(self) -> EheimStateStore:
+        """Update the devices whose poll is due via Websocket.
+
+        Devices that fail or miss the cycle deadline are marked unavailable
+        while the others are updated, and their last values are shown until
+        they are older than STALE_DATA_MAX_AGE. The update only fails while
+        the connection is down.
+        """
         LOGGER.debug("COORDINATOR: Starting data update")
-        num_devices = len(self.devices)
-        LOGGER.debug("COORDINATOR: Number of devices: %s", num_devices)
+        if not self.websocket_client.is_connected:
+            # Reconnecting is left to the connection manager
+            raise UpdateFailed(
+                f"WebSocket is {self.websocket_client.connection_state}"
+            )
+        now = time.monotonic()
+        devices = [
+            device
+            for device in self.scheduler.due_devices(self.devices, now)
+            if self._request_plan(device)
+        ]
+        if not devices:
+            return self.store
+        num_devices = len(devices)
+        LOGGER.debug("COORDINATOR: Number of devices due: %s", num_devices)
+        start = time.monotonic()
         try:
             LOGGER.debug("COORDINATOR: Calling WebSocket to update data in Coordinator")
-            for device in self.devices:
-                LOGGER.debug("COORDINATOR: Device: %s", device)
-                device_data = await self.websocket_client.get_device_data(device)
-                all_device_data[device.mac] = device_data
-                # device_data = await self.websocket_client.get_device_data(device)
-                # all_device_data[device.device_type, device.mac] = device_data
-                LOGGER.debug(
-                    "COORDINATOR: Device %s data in Coordinator: %s",
-                    device,
-                    device_data,
-                )
+            if self.concurrent_updates:
+                tasks = {
+                    asyncio.create_task(self._async_get_device_data(device)): device
+                    for device in devices
+                }
+                done, pending = await asyncio.wait(tasks, timeout=UPDATE_CYCLE_TIMEOUT)
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+                for task, device in tasks.items():
+                    if task not in done:
+                        self._record_failure(device, now, "update cycle timed out")
+                    elif (error := task.exception()) is not None:
+                        self._record_failure(device, now, error)
+                    else:
+                        self._record_poll(device, now, task.result())
+            else:
+                deadline = start + UPDATE_CYCLE_TIMEOUT
+                for device in devices:
+                    LOGGER.debug("COORDINATOR: Device: %s", device)
+                    try:
+                        async with timeout(max(deadline - time.monotonic(), 0)):
+                            device_data = await self.websocket_client.get_device_data(
+                                device, requests=self._request_plan(device)
+                            )
+                    except asyncio.TimeoutError:
+                        self._record_failure(device, now, "update cycle timed out")
+                        continue
+                    except Exception as error:  # pylint: disable=broad-except
+                        self._record_failure(device, now, error)
+                        continue
+                    self._record_poll(device, now, device_data)
+                    LOGGER.debug(
+                        "COORDINATOR: Device %s data in Coordinator: %s",
+                        device,
+                        device_data,
+                    )
+        finally:
+            self.last_update_duration = time.monotonic() - start
+            LOGGER.debug(
+                "COORDINATOR: Update cycle for %s devices took %.3f s (%s)",
+                num_devices,
+                self.last_update_duration,
+                "concurrent" if self.concurrent_updates else "sequential",
+            )
 
-        except Exception as error:
-            raise UpdateFailed(error) from error
+        return self.store
+
+    def _record_poll(
+        self, device: EheimDevice, now: float, responses: list[dict[str, Any]]
+    ):
+        """Store the responses of a polled device and adapt its poll interval."""
+        self._set_device_available(device.mac)
+        changed = self._store_responses(device.mac, responses)
+        significant = POLL_SIGNIFICANT_FIELDS.get(device.device_group, set())
+        alert = any(
+            getattr(entry.data, "alert_state", None)
+            for entry in (self.store.get(device.mac) or {}).values()
+        )
+        self.scheduler.record_poll(
+            device, now, not changed.isdisjoint(significant), alert
+        )
+
+    def _record_failure(self, device: EheimDevice, now: float, error: Any):
+        """Mark a device that did not answer its poll as unavailable."""
+        if device.mac not in self.unavailable_devices:
+            LOGGER.warning("COORDINATOR: Device %s did not answer: %s", device, error)
+            self.unavailable_devices.add(device.mac)
+        else:
+            LOGGER.debug("COORDINATOR: Device %s still not answering", device.mac)
+        # Listeners re-check availability and the age of the data shown
+        self._mark_device_changed(device.mac)
+        self.scheduler.record_failure(device, now)
+
+    def _set_device_available(self, mac_address: str) -> None:
+        """Mark a device that answered as available again."""
+        if mac_address in self.unavailable_devices:
+            LOGGER.info("COORDINATOR: Device %s is answering again", mac_address)
+            self.unavailable_devices.discard(mac_address)
+            self._mark_device_changed(mac_address)
+
+    def _mark_device_changed(self, mac_address: str) -> None:
+        """Record every stored field of a device as changed."""
+        for entry in (self.store.get(mac_address) or {}).values():
+            self._changed_fields.update(
+                (mac_address, field) for field in type(entry.data).FIELDS.values()
+            )
+
+    def _store_responses(
+        self, mac_address: str, responses: list[dict[str, Any]]
+    ) -> set[str]:
+        """Store the responses of a device and record the changed fields."""
+        changed = set()
+        for response in responses:
+            changed |= self.store.update(mac_address, response)
+            # The device confirmed the optimistic state
+            key = (mac_address, response.get("title"))
+            if key in self._confirm_timers and not self.store.is_optimistic(*key):
+                self._confirm_timers.pop(key)()
+        self._changed_fields.update((mac_address, field) for field in changed)
+        if changed:
+            self._snapshot.async_delay_save(self.store.as_snapshot, SNAPSHOT_SAVE_DELAY)
+        return changed
+
+    async def _async_get_device_data(self, device) -> list[dict[str, Any]]:
+        """Fetch the data of one device, bounded by the update semaphore."""
+        async with self._update_semaphore:
+            device_data = await self.websocket_client.get_device_data(
+                device, concurrent=True, requests=self._request_plan(device)
+            )
         LOGGER.debug(
-            "COORDINATOR: Final aggregated data in Coordinator: %s", all_device_data
+            "COORDINATOR: Device %s data in Coordinator: %s", device, device_data
         )
-        return all_device_data
+        return device_data
+
+
+def _has_enabled_entity(
+    registry: er.EntityRegistry, device: EheimDevice, request: DataRequest
+) -> bool:
+    """Return True if an entity of a device that reads a request is enabled."""
+    for platform, keys in request.entities.items():
+        if platform not in PLATFORMS:
+            continue
+        for key in keys:
+            entity_id = registry.async_get_entity_id(
+                platform, DOMAIN, entity_unique_id(device, key)
+            )
+            if entity_id is None or not registry.entities[entity_id].disabled:
+                return True
+    return False
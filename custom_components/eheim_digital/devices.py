@@ -1,219 +1,121 @@
 """EHEIM Device representation."""
-from .const import LOGGER, DEVICE_VERSIONS, DEVICE_GROUPS, FILTER_PUMP_MODES
+from __future__ import annotations
 
+from dataclasses import dataclass, field
+from typing import Any, ClassVar
 
+from .const import DEVICE_GROUPS, DEVICE_VERSIONS, LOGGER
+
+# Device type -> device group, resolved once instead of on every access
+DEVICE_GROUP_INDEX = {
+    device_type: group
+    for group, device_types in DEVICE_GROUPS.items()
+    for device_type in device_types
+}
+
+
+@dataclass(frozen=True, slots=True, eq=False)
 class EheimDevice:
     """EHEIM Device representation."""
 
-    def __init__(self, data: dict) -> None:
-        """EHEIM Device initialization."""
-        self._title = data.get("title")
-        self._mac = data.get("from")
-        self._name = data.get("name")
-        self._aq_name = data.get("aqName")
-        self._mode = data.get("mode")  # Optional
-        self._version = data.get("version")
-        self._language = data.get("language")
-        self._timezone = data.get("timezone")
-        self._tank_id = data.get("tID")
-        self._dst = data.get("dst")
-        self._tank_config = data.get("tankconfig")
-        self._power = data.get("power")
-        self._net_mode = data.get("netmode")
-        self._host = data.get("host")
-        self._group_id = data.get("groupID")
-        self._meshing = data.get("meshing")
-        self._first_start = data.get("firstStart")
-        self._remote = data.get("remote")  # Optional
-        self._revision = data.get("revision")
-        self._latest_available_revision = data.get("latestAvailableRevision")
-        self._firmware_available = data.get("firmwareAvailable")
-        self._email_address = data.get("emailAddr")
-        self._live_time = data.get("liveTime")
-        self._user_name = data.get("usrName")
-        self._unit = data.get("unit")
-        self._demo_use = data.get("demoUse")
-        self._sys_led = data.get("sysLED")  # Optional
-
-        LOGGER.debug(
-            "DEVICES: EheimDevice %s: with MAC: %s initialized", self.name, self._mac
+    # Attribute name -> raw field name in the USRDTA payload
+    FIELDS: ClassVar[dict[str, str]] = {
+        "title": "title",
+        "mac": "from",
+        "device_name": "name",
+        "aq_name": "aqName",
+        "mode": "mode",  # Optional, specific to LED Control
+        "version": "version",
+        "language": "language",
+        "timezone": "timezone",
+        "tank_id": "tID",
+        "dst": "dst",
+        "tank_config": "tankconfig",
+        "power": "power",
+        "net_mode": "netmode",
+        "host": "host",
+        "group_id": "groupID",
+        "meshing": "meshing",
+        "first_start": "firstStart",
+        "remote": "remote",  # Optional
+        "revision": "revision",
+        "latest_available_revision": "latestAvailableRevision",
+        "firmware_available": "firmwareAvailable",
+        "email_address": "emailAddr",
+        "live_time": "liveTime",
+        "user_name": "usrName",
+        "unit": "unit",
+        "demo_use": "demoUse",
+        "sys_led": "sysLED",  # Optional, specific to LED Control
+    }
+
+    # The USRDTA payload the device was built from
+    data: dict[str, Any] = field(repr=False)
+    title: str | None
+    mac: str
+    device_name: str | None
+    aq_name: str | None
+    mode: str | None
+    version: int | None
+    language: str | None
+    timezone: int | None
+    tank_id: int | None
+    dst: int | None
+    tank_config: str | None
+    power: str | None
+    net_mode: str | None
+    host: str | None
+    group_id: int | None
+    meshing: int | None
+    first_start: int | None
+    remote: int | None
+    revision: list | None
+    latest_available_revision: list | None
+    firmware_available: int | None
+    email_address: str | None
+    live_time: int | None
+    user_name: str | None
+    unit: int | None
+    demo_use: int | None
+    sys_led: int | None
+    device_type: str
+    device_group: str
+
+    @classmethod
+    def from_payload(cls, data: dict[str, Any]) -> EheimDevice:
+        """Build a device from a USRDTA payload."""
+        device_type = DEVICE_VERSIONS.get(data.get("version"), "DEVICE VERSION UNKNOWN")
+        device = cls(
+            data,
+            **{name: data.get(raw) for name, raw in cls.FIELDS.items()},
+            device_type=device_type,
+            device_group=DEVICE_GROUP_INDEX.get(device_type, "DEVICE GROUP NOT FOUND"),
         )
-        LOGGER.debug("DEVICES: Initializing with data: %s", data)
+        LOGGER.debug("DEVICES: Initialized %s", device)
+        return device
 
     @property
-    def name(self):
+    def name(self) -> str:
         """Return the name of the device."""
-        return f"EHEIM {self._name}"
+        return f"EHEIM {self.device_name}"
 
     @property
-    def model(self):
+    def model(self) -> str:
         """Return the model of the device."""
-        return f"{self.device_type}"
+        return self.device_type
 
     @property
-    def unique_id(self):
+    def unique_id(self) -> str:
         """Return a unique ID."""
         return self.mac
 
-    @property
-    def title(self) -> str:
-        """Title of the device response."""
-        return self._title
-
-    @property
-    def mac(self) -> str:
-        """MAC address of the device."""
-        return self._mac
-
-    @property
-    def device_name(self) -> str:
-        """Name of the device."""
-        return self._name
-
-    @property
-    def aq_name(self) -> str:
-        """Name of the aquarium associated with the device."""
-        return self._aq_name
-
-    @property
-    def mode(self) -> str:
-        """Mode of the device (specific to LED Control)."""
-        return self._mode
-
-    @property
-    def version(self) -> int:
-        """Version information for the device."""
-        return self._version
-
-    @property
-    def language(self) -> str:
-        """Language setting of the device."""
-        return self._language
-
-    @property
-    def timezone(self) -> int:
-        """Timezone setting of the device."""
-        return self._timezone
-
-    @property
-    def tank_id(self) -> int:
-        """Tank ID of the device."""
-        return self._tank_id
-
-    @property
-    def dst(self) -> int:
-        """Daylight Saving Time setting of the device."""
-        return self._dst
-
-    @property
-    def tank_config(self) -> str:
-        """Tank configuration information."""
-        return self._tank_config
-
-    @property
-    def power(self) -> str:
-        """Power information for the device."""
-        return self._power
-
-    @property
-    def net_mode(self) -> str:
-        """Network mode of the device."""
-        return self._net_mode
-
-    @property
-    def host(self) -> str:
-        """Host information for the device."""
-        return self._host
-
-    @property
-    def group_id(self) -> int:
-        """Group ID of the device."""
-        return self._group_id
-
-    @property
-    def meshing(self) -> int:
-        """Meshing information for the device."""
-        return self._meshing
-
-    @property
-    def first_start(self) -> int:
-        """First start information for the device."""
-        return self._first_start
-
-    @property
-    def remote(self) -> int:
-        """Remote information for the device."""
-        return self._remote
-
-    @property
-    def revision(self) -> list:
-        """Revision information for the device."""
-        return self._revision
-
-    @property
-    def latest_available_revision(self) -> list:
-        """Latest available revision information for the device."""
-        return self._latest_available_revision
-
-    @property
-    def firmware_available(self) -> int:
-        """Firmware availability information for the device."""
-        return self._firmware_available
-
-    @property
-    def email_address(self) -> str:
-        """Email address information for the device."""
-        return self._email_address
-
-    @property
-    def live_time(self) -> int:
-        """Live time information for the device."""
-        return self._live_time
-
-    @property
-    def user_name(self) -> str:
-        """User name information for the device."""
-        return self._user_name
-
-    @property
-    def unit(self) -> int:
-        """Unit information for the device."""
-        return self._unit
-
-    @property
-    def demo_use(self) -> int:
-        """Demo use information for the device."""
-        return self._demo_use
-
-    @property
-    def sys_led(self) -> int:
-        """System LED status for the device (specific to LED Control)."""
-        return self._sys_led
-
-    @property
-    def device_type(self) -> str:
-        """Return the device type."""
-        if self._version in DEVICE_VERSIONS:
-            return DEVICE_VERSIONS[self._version]
-        return "DEVICE VERSION UNKNOWN"
-
-    @property
-    def device_group(self) -> str:
-        """Return the device group."""
-        for group, versions in DEVICE_GROUPS.items():
-            if self.device_type in versions:
-                return group
-        return "DEVICE GROUP NOT FOUND"
-
-    def __repr__(self):
+    def __repr__(self) -> str:
         """String representation of the EheimDevice."""
-        # return f"EheimDevice(title={self._title}, name={self.name}, mac={self._mac}, device_type={self.device_type}, device_group={self.device_group})"
-        return f"EheimDevice(title={self._title}, name={self.name}, mac={self._mac}, aqname={self.aq_name}, mode={self.mode}, version={self._version}, language={self._language}, timezone={self._timezone}, tankid={self._tank_id}, dst={self._dst}, tankconfig={self._tank_config}, power={self._power}, netmode={self._net_mode}, host={self._host}, groupid={self._group_id}, meshing={self._meshing}, firststart={self._first_start}, remote={self._remote}, revision={self._revision}, latestavailablerevision={self._latest_available_revision}, firmwareavailable={self._firmware_available}, emailaddress={self._email_address}, livetime={self._live_time}, username={self._user_name}, unit={self._unit}, demouse={self._demo_use}, sysled={self._sys_led}, device_type={self.device_type}, device_group={self.device_group})"
+        return (
+            f"EheimDevice(name={self.name}, mac={self.mac}, "
+            f"device_type={self.device_type}, device_group={self.device_group})"
+        )
 
-    def update(self, data: dict) -> None:
-        """Update the device with new data."""
-        for key, value in data.items():
-            attribute_name = f"_{key.lower()}"
-            if hasattr(self, attribute_name):
-                setattr(self, attribute_name, value)
-        LOGGER.debug("DEVICES: Updated EheimDevice %s: with data: %s", self.name, data)
+    def update(self, data: dict[str, Any]) -> EheimDevice:
+        """Return the device with the fields of a newer USRDTA payload applied."""
+        return EheimDevice.from_payload({**self.data, **data})
@@ -0,0 +1,57 @@
+"""Diagnostics support for EHEIM Digital."""
+from __future__ import annotations
+
+import time
+from dataclasses import asdict
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_IP_ADDRESS
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .coordinator import EheimDigitalDataUpdateCoordinator
+
+TO_REDACT = {CONF_IP_ADDRESS}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: EheimDigitalDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    client = coordinator.websocket_client
+    metrics = client.connection_metrics
+    now = time.monotonic()
+
+    return {
+        "entry": {
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "connection": {
+            "state": client.connection_state,
+            "reconnect_count": metrics.reconnect_count,
+            "failed_attempts": metrics.failed_attempts,
+            "downtime": round(metrics.current_downtime(now), 1),
+            "connected_for": None
+            if metrics.connected_since is None
+            else round(now - metrics.connected_since, 1),
+        },
+        "command_queue": asdict(client.queue_counters),
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "last_update_duration": coordinator.last_update_duration,
+            "unavailable_devices": sorted(coordinator.unavailable_devices),
+        },
+        "devices": [
+            {
+                "mac": device.mac,
+                "type": device.device_type,
+                "group": device.device_group,
+                "circuit_breaker": client.breaker_state(device.mac),
+            }
+            for device in coordinator.devices
+        ],
+    }
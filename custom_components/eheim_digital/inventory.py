@@ -0,0 +1,38 @@
+"""Persistent EHEIM Digital device inventory."""
+from __future__ import annotations
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import INVENTORY_STORAGE_KEY, LOGGER, STORAGE_VERSION
+from .devices import EheimDevice
+
+
+class EheimDeviceInventory:
+    """The devices last discovered on the master of a config entry."""
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+        """Initialize the inventory of a config entry."""
+        self._store: Store[dict[str, list[dict]]] = Store(
+            hass, STORAGE_VERSION, f"{INVENTORY_STORAGE_KEY}.{entry.entry_id}"
+        )
+
+    async def async_load(self) -> list[EheimDevice] | None:
+        """Return the cached devices, or None if nothing is cached."""
+        if not (data := await self._store.async_load()):
+            return None
+        devices = [
+            EheimDevice.from_payload(payload) for payload in data.get("devices", [])
+        ]
+        LOGGER.debug("INVENTORY: Loaded %s cached devices", len(devices))
+        return devices or None
+
+    async def async_save(self, devices: list[EheimDevice]) -> None:
+        """Cache the USRDTA payloads of the devices."""
+        await self._store.async_save({"devices": [device.data for device in devices]})
+        LOGGER.debug("INVENTORY: Saved %s devices", len(devices))
+
+    async def async_remove(self) -> None:
+        """Remove the cached inventory."""
+        await self._store.async_remove()
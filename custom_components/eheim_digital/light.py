@@ -4,6 +4,7 @@ from homeassistant.core import HomeAssistant
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
+from .capabilities import entity_unique_id
 from .coordinator import EheimDigitalDataUpdateCoordinator
 from .devices import EheimDevice
 from .const import LOGGER, DOMAIN
@@ -45,7 +46,7 @@ class EheimLedDevice(LightEntity):
     @property
     def unique_id(self):
         """Return a unique ID."""
-        return self.device.mac
+        return entity_unique_id(self.device, "light")
 
     @property
     def is_on(self):
@@ -54,25 +55,15 @@ class EheimLedDevice(LightEntity):
 
     async def async_turn_on(self, **kwargs):
         """Turn the light on."""
-        await self.coordinator.turn_light_on(self.mac)
+        await self.coordinator.async_turn_light_on(self.mac)
 
     async def async_turn_off(self, **kwargs):
         """Turn the light off."""
-        await self.coordinator.turn_light_off(self.mac)
+        await self.coordinator.async_turn_light_off(self.mac)
 
     async def set_moonlight_settings(self, min_moonlight, max_moonlight, moonlight_active, moonlight_cycle, moon_color):
         """Set moonlight settings."""
-        data = {
-            "title": "MOON",
-            "to": self.mac,
-            "minmoonlight": min_moonlight,
-            "maxmoonlight": max_moonlight,
-            "moonlightActive": moonlight_active,
-            "moonlightCycle": moonlight_cycle,
-            "moonColor": moon_color,
-            "from": "USER"
-        }
-        await self.coordinator.set_moonlight_settings(data)
+        await self.coordinator.async_set_moonlight_settings(self.mac, min_moonlight, max_moonlight, moonlight_active, moonlight_cycle, moon_color)
         # Update entity attributes based on the new settings
         self.min_moon_light = min_moonlight
         self.max_moon_light = max_moonlight
@@ -81,20 +72,7 @@ class EheimLedDevice(LightEntity):
 
     async def set_cloud_settings(self, cloud_probability, cloud_max_amount, cloud_min_intensity, cloud_max_intensity, cloud_min_duration, cloud_max_duration, cloud_active):
         """Set cloud settings."""
-        data = {
-            "title": "CLOUD",
-            "to": self.mac,
-            "probability": cloud_probability,
-            "maxAmount": cloud_max_amount,
-            "minIntensity": cloud_min_intensity,
-            "maxIntensity": cloud_max_intensity,
-            "minDuration": cloud_min_duration,
-            "maxDuration": cloud_max_duration,
-            "cloudActive": cloud_active,
-            "mode": 2,
-            "from": "USER"
-        }
-        await self.coordinator.set_cloud_settings(data)
+        await self.coordinator.async_set_cloud_settings(self.mac, cloud_probability, cloud_max_amount, cloud_min_intensity, cloud_max_intensity, cloud_min_duration, cloud_max_duration, cloud_active)
         # Update entity attributes based on the new settings
         self.cloud_probability = cloud_probability
         self.cloud_max_amount = cloud_max_amount
@@ -124,9 +102,7 @@ class EheimLedDevice(LightEntity):
 
     async def set_channel_values(self, channel_values: list[int]):
         """Set current channel values for the LED."""
-        response = await self.coordinator.set_channel_values(self.mac, channel_values)
-        if response:
-            self.process_device_data(response)
+        await self.coordinator.async_set_color_channel_values(self.mac, channel_values)
 
     async def request_acclimation_settings(self):
         """Request acclimation settings for the LED."""
@@ -137,9 +113,7 @@ class EheimLedDevice(LightEntity):
 
     async def set_acclimation_settings(self, duration, intensity_reduction, current_accl_day, accl_active, accl_pause):
         """Set acclimation settings for the LED."""
-        response = await self.coordinator.set_acclimation_settings(self.mac, duration, intensity_reduction, current_accl_day, accl_active, accl_pause)
-        if response:
-            self.process_device_data(response)
+        await self.coordinator.async_set_acclimation_settings(self.mac, duration, intensity_reduction, current_accl_day, accl_active, accl_pause)
 
     async def request_dynamic_cycle_settings(self):
         """Request dynamic cycle settings for the LED."""
@@ -185,7 +159,7 @@ class EheimLedDevice(LightEntity):
             self.acclimate_intensity_reduction = device_data.get('intensityReduction')
             self.acclimate_current_accl_day = device_data.get('currentAcclDay')
             self.acclimate_active = self.convert_boolean_to_string(device_data.get('acclActive'))
-            self.acclimate_pause = self.convert_boolean_to_string(device_data.get('acclPause'))
+            self.acclimate_pause = self.convert_boolean_to_string(device_data.get('pause'))
 
     @staticmethod
     def convert_boolean_to_string(boolean) -> str:
@@ -0,0 +1,370 @@
+"""Typed EHEIM Digital device state."""
+from __future__ import annotations
+
+import itertools
+import time
+from dataclasses import dataclass
+from typing import Any, ClassVar, TypeVar
+
+from .const import LOGGER
+
+_DataT = TypeVar("_DataT", bound="EheimMessageData")
+
+
+class EheimMessageData:
+    """Base class of the typed state carried by one message title."""
+
+    __slots__ = ()
+
+    TITLE: ClassVar[str]
+    # Attribute name -> raw field name in the message payload
+    FIELDS: ClassVar[dict[str, str]] = {}
+
+    @classmethod
+    def from_payload(cls: type[_DataT], payload: dict[str, Any]) -> _DataT:
+        """Keep only the fields the platforms read from a message payload."""
+        return cls(**{name: payload.get(raw) for name, raw in cls.FIELDS.items()})
+
+
+@dataclass(frozen=True, slots=True)
+class FilterData(EheimMessageData):
+    """State of a canister filter."""
+
+    TITLE: ClassVar[str] = "FILTER_DATA"
+    FIELDS: ClassVar[dict[str, str]] = {
+        "filter_active": "filterActive",
+        "freq": "freq",
+        "max_freq_rgl_off": "maxFreqRglOff",
+        "actual_time": "actualTime",
+        "service_hour": "serviceHour",
+        "turn_off_time": "turnOffTime",
+        "start_time_night_mode": "start_time_night_mode",
+        "end_time_night_mode": "end_time_night_mode",
+    }
+
+    filter_active: int | None
+    freq: int | None
+    max_freq_rgl_off: int | None
+    actual_time: int | None
+    service_hour: int | None
+    turn_off_time: int | None
+    start_time_night_mode: int | None
+    end_time_night_mode: int | None
+
+
+@dataclass(frozen=True, slots=True)
+class HeaterData(EheimMessageData):
+    """State of a heater."""
+
+    TITLE: ClassVar[str] = "HEATER_DATA"
+    FIELDS: ClassVar[dict[str, str]] = {
+        "is_temp": "isTemp",
+        "soll_temp": "sollTemp",
+        "is_heating": "isHeating",
+        "alert_state": "alert_State",
+        "active": "active",
+    }
+
+    is_temp: int | None
+    soll_temp: int | None
+    is_heating: int | None
+    alert_state: int | None
+    active: int | None
+
+
+@dataclass(frozen=True, slots=True)
+class PhData(EheimMessageData):
+    """State of a pH controller."""
+
+    TITLE: ClassVar[str] = "PH_DATA"
+    FIELDS: ClassVar[dict[str, str]] = {
+        "is_ph": "isPH",
+        "soll_ph": "sollPH",
+        "kh": "kH",
+        "service_time": "serviceTime",
+        "day_start_time": "dayStartT",
+        "night_start_time": "nightStartT",
+        "acclimatization": "acclimatization",
+        "active": "active",
+        "alert_state": "alertState",
+        "valve_is_active": "valveIsActive",
+    }
+
+    is_ph: int | None
+    soll_ph: int | None
+    kh: int | None
+    service_time: int | None
+    day_start_time: int | None
+    night_start_time: int | None
+    acclimatization: int | None
+    active: int | None
+    alert_state: int | None
+    valve_is_active: int | None
+
+
+@dataclass(frozen=True, slots=True)
+class ColorChannelValues(EheimMessageData):
+    """Current color channel values of an LED controller."""
+
+    TITLE: ClassVar[str] = "CCV"
+    FIELDS: ClassVar[dict[str, str]] = {"current_values": "currentValues"}
+
+    current_values: list[int] | None
+
+
+@dataclass(frozen=True, slots=True)
+class AcclimationSettings(EheimMessageData):
+    """Acclimation settings of an LED controller."""
+
+    TITLE: ClassVar[str] = "ACCLIMATE"
+    FIELDS: ClassVar[dict[str, str]] = {
+        "duration": "duration",
+        "intensity_reduction": "intensityReduction",
+        "current_accl_day": "currentAcclDay",
+        "accl_active": "acclActive",
+        "accl_pause": "pause",
+    }
+
+    duration: int | None
+    intensity_reduction: int | None
+    current_accl_day: int | None
+    accl_active: int | None
+    accl_pause: int | None
+
+
+@dataclass(frozen=True, slots=True)
+class DynamicCycleSettings(EheimMessageData):
+    """Dynamic cycle settings of an LED controller."""
+
+    TITLE: ClassVar[str] = "DYCL"
+
+
+@dataclass(frozen=True, slots=True)
+class MoonSettings(EheimMessageData):
+    """Moonlight settings of an LED controller."""
+
+    TITLE: ClassVar[str] = "MOON"
+    FIELDS: ClassVar[dict[str, str]] = {
+        "max_moonlight": "maxmoonlight",
+        "min_moonlight": "minmoonlight",
+        "moonlight_active": "moonlightActive",
+        "moonlight_cycle": "moonlightCycle",
+    }
+
+    max_moonlight: int | None
+    min_moonlight: int | None
+    moonlight_active: int | None
+    moonlight_cycle: int | None
+
+
+@dataclass(frozen=True, slots=True)
+class CloudSettings(EheimMessageData):
+    """Cloud simulation settings of an LED controller."""
+
+    TITLE: ClassVar[str] = "CLOUD"
+    FIELDS: ClassVar[dict[str, str]] = {
+        "probability": "probability",
+        "max_amount": "maxAmount",
+        "min_intensity": "minIntensity",
+        "max_intensity": "maxIntensity",
+        "min_duration": "minDuration",
+        "max_duration": "maxDuration",
+        "cloud_active": "cloudActive",
+    }
+
+    probability: int | None
+    max_amount: int | None
+    min_intensity: int | None
+    max_intensity: int | None
+    min_duration: int | None
+    max_duration: int | None
+    cloud_active: int | None
+
+
+@dataclass(frozen=True, slots=True)
+class DeviceDescription(EheimMessageData):
+    """Channel description of an LED controller."""
+
+    TITLE: ClassVar[str] = "DSCRPTN"
+
+
+MESSAGE_TYPES: dict[str, type[EheimMessageData]] = {
+    message_type.TITLE: message_type
+    for message_type in (
+        FilterData,
+        HeaterData,
+        PhData,
+        ColorChannelValues,
+        AcclimationSettings,
+        DynamicCycleSettings,
+        MoonSettings,
+        CloudSettings,
+        DeviceDescription,
+    )
+}
+
+
+@dataclass(slots=True)
+class StateEntry:
+    """The latest state of one message title of a device."""
+
+    data: EheimMessageData
+    received: float
+    sequence: int
+    # Restored from the last session and not yet confirmed by the master
+    stale: bool = False
+    # Expected after a command and not yet confirmed by the device
+    optimistic: bool = False
+
+
+class EheimStateStore:
+    """Latest typed state per device MAC and message title."""
+
+    def __init__(self) -> None:
+        """Initialize an empty store."""
+        self._devices: dict[str, dict[str, StateEntry]] = {}
+        self._sequence = itertools.count(1)
+        # Entries replaced by optimistic state and the raw fields the device
+        # has to report to confirm it, keyed by (MAC, title)
+        self._confirmed: dict[tuple[str, str], StateEntry | None] = {}
+        self._expected: dict[tuple[str, str], dict[str, Any]] = {}
+
+    def __contains__(self, mac_address: str) -> bool:
+        """Return True if any state is stored for the device."""
+        return mac_address in self._devices
+
+    def get(self, mac_address: str) -> dict[str, StateEntry] | None:
+        """Return all state entries of a device keyed by message title."""
+        return self._devices.get(mac_address)
+
+    def entry(self, mac_address: str, title: str) -> StateEntry | None:
+        """Return the state entry of a device for a message title."""
+        return self._devices.get(mac_address, {}).get(title)
+
+    def get_data(self, mac_address: str, data_type: type[_DataT]) -> _DataT | None:
+        """Return the typed state of a device for a message type."""
+        if (entry := self.entry(mac_address, data_type.TITLE)) is None:
+            return None
+        return entry.data
+
+    def is_optimistic(self, mac_address: str, title: str) -> bool:
+        """Return True if the state of a title awaits confirmation."""
+        return (mac_address, title) in self._confirmed
+
+    def apply_optimistic(
+        self, mac_address: str, title: str, fields: dict[str, Any]
+    ) -> set[str]:
+        """Store the state expected after a command and return the changed fields.
+
+        The raw fields are merged into the current state of the title, which is
+        kept until the device reports the same fields or it is rolled back.
+        """
+        data_type = MESSAGE_TYPES[title]
+        entries = self._devices.setdefault(mac_address, {})
+        previous = entries.get(title)
+        current = {} if previous is None else _raw_fields(previous.data)
+        data = data_type.from_payload({**current, **fields})
+        key = (mac_address, title)
+        self._confirmed.setdefault(key, previous)
+        self._expected[key] = {**self._expected.get(key, {}), **fields}
+        entries[title] = StateEntry(
+            data, time.time(), next(self._sequence), optimistic=True
+        )
+        return _changed_fields(previous, data)
+
+    def rollback(self, mac_address: str, title: str) -> set[str]:
+        """Restore the state replaced by unconfirmed optimistic state."""
+        if (key := (mac_address, title)) not in self._confirmed:
+            return set()
+        previous = self._confirmed.pop(key)
+        self._expected.pop(key, None)
+        entries = self._devices[mac_address]
+        current = entries.pop(title)
+        if previous is None:
+            return set(type(current.data).FIELDS.values())
+        entries[title] = previous
+        return _changed_fields(current, previous.data)
+
+    def as_snapshot(self) -> dict[str, dict[str, list]]:
+        """Return the stored state as [received, raw fields] per MAC and title."""
+        return {
+            mac_address: {
+                title: [
+                    entry.received,
+                    _raw_fields(entry.data),
+                ]
+                for title, entry in entries.items()
+            }
+            for mac_address, entries in self._devices.items()
+        }
+
+    def restore(self, snapshot: dict[str, dict[str, list]]) -> None:
+        """Load a snapshot, flagging every restored entry as stale."""
+        for mac_address, titles in snapshot.items():
+            entries = self._devices.setdefault(mac_address, {})
+            for title, (received, fields) in titles.items():
+                if (data_type := MESSAGE_TYPES.get(title)) is None:
+                    continue
+                entries[title] = StateEntry(
+                    data_type.from_payload(fields),
+                    received,
+                    next(self._sequence),
+                    stale=True,
+                )
+
+    def update(self, mac_address: str, payload: dict[str, Any]) -> set[str]:
+        """Store a message payload of a device and return the changed raw fields.
+
+        Payloads whose title carries no state are ignored. The first message of
+        a title reports all of its fields as changed. While a title awaits
+        confirmation, a payload that does not match the expected fields, like
+        a reply already in flight when the command was sent, only replaces
+        the state restored on rollback.
+        """
+        data_type = MESSAGE_TYPES.get(payload.get("title"))
+        if data_type is None:
+            LOGGER.debug(
+                "STORE: Ignoring %s message for device %s",
+                payload.get("title"),
+                mac_address,
+            )
+            return set()
+
+        data = data_type.from_payload(payload)
+        entry = StateEntry(data, time.time(), next(self._sequence))
+        key = (mac_address, data_type.TITLE)
+        if (expected := self._expected.get(key)) is not None and any(
+            payload.get(raw) != value for raw, value in expected.items()
+        ):
+            self._confirmed[key] = entry
+            return set()
+
+        entries = self._devices.setdefault(mac_address, {})
+        previous = entries.get(data_type.TITLE)
+        entries[data_type.TITLE] = entry
+        self._confirmed.pop(key, None)
+        self._expected.pop(key, None)
+        return _changed_fields(previous, data)
+
+
+def _raw_fields(data: EheimMessageData) -> dict[str, Any]:
+    """Return the set fields of typed state by their raw field name."""
+    return {
+        raw: value
+        for name, raw in type(data).FIELDS.items()
+        if (value := getattr(data, name)) is not None
+    }
+
+
+def _changed_fields(previous: StateEntry | None, data: EheimMessageData) -> set[str]:
+    """Return the raw fields that differ from the previous entry.
+
+    All fields count as changed if there was no entry or it was stale.
+    """
+    if previous is None or previous.stale:
+        return set(type(data).FIELDS.values())
+    return {
+        raw
+        for name, raw in type(data).FIELDS.items()
+        if getattr(previous.data, name) != getattr(data, name)
+    }
@@ -0,0 +1,126 @@
+"""Adaptive per-device-group poll scheduler."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from .const import (
+    LOGGER,
+    MAX_POLL_BACKOFF,
+    MAX_POLL_INTERVAL,
+    MIN_POLL_INTERVAL,
+    STABLE_POLLS_BEFORE_BACKOFF,
+)
+from .devices import EheimDevice
+
+
+@dataclass(slots=True)
+class _DeviceSchedule:
+    """Poll schedule of one device."""
+
+    base_interval: float
+    interval: float
+    requests_per_poll: int
+    next_due: float = 0.0
+    stable_polls: int = 0
+
+
+class EheimPollScheduler:
+    """Decide which devices are due for a poll.
+
+    Every device starts at the interval of its group. The interval halves
+    while its POLL_SIGNIFICANT_FIELDS change or an alert is active, down to
+    MIN_POLL_INTERVAL, and doubles after STABLE_POLLS_BEFORE_BACKOFF polls
+    without such a change, up to MAX_POLL_BACKOFF times the group interval.
+    All intervals are stretched when the projected request rate would exceed
+    the request budget.
+    """
+
+    def __init__(
+        self,
+        intervals: dict[str, float],
+        requests_per_poll: dict[str, int],
+        request_budget: float,
+    ) -> None:
+        """Initialize the scheduler with group intervals in seconds and a budget in requests per minute."""
+        self._intervals = intervals
+        self._requests_per_poll = requests_per_poll
+        self._request_budget = request_budget
+        self._schedules: dict[str, _DeviceSchedule] = {}
+        self._budget_factor = 1.0
+
+    def _schedule(self, device: EheimDevice) -> _DeviceSchedule | None:
+        """Return the schedule of a device, creating it on first use."""
+        if (schedule := self._schedules.get(device.mac)) is None:
+            interval = self._intervals.get(device.device_group)
+            if interval is None:
+                return None
+            schedule = self._schedules[device.mac] = _DeviceSchedule(
+                interval,
+                interval,
+                self._requests_per_poll.get(device.device_group, 1),
+            )
+            self._update_budget_factor()
+        return schedule
+
+    def _update_budget_factor(self) -> None:
+        """Stretch all intervals if the projected request rate exceeds the budget."""
+        projected = sum(
+            schedule.requests_per_poll * 60 / schedule.interval
+            for schedule in self._schedules.values()
+        )
+        self._budget_factor = max(projected / self._request_budget, 1.0)
+        if self._budget_factor > 1:
+            LOGGER.debug(
+                "SCHEDULER: Projected %.1f requests/min exceed the budget of %s, "
+                "stretching intervals by %.2f",
+                projected,
+                self._request_budget,
+                self._budget_factor,
+            )
+
+    def due_devices(self, devices: list[EheimDevice], now: float) -> list[EheimDevice]:
+        """Return the devices whose next poll is due."""
+        return [
+            device
+            for device in devices
+            if (schedule := self._schedule(device)) is not None
+            and schedule.next_due <= now
+        ]
+
+    def record_poll(
+        self, device: EheimDevice, now: float, changed: bool, alert: bool
+    ) -> None:
+        """Adapt the interval of a device to the outcome of its poll."""
+        if (schedule := self._schedule(device)) is None:
+            return
+
+        if changed or alert:
+            schedule.interval = max(schedule.interval / 2, MIN_POLL_INTERVAL)
+            schedule.stable_polls = 0
+        else:
+            schedule.stable_polls += 1
+            if schedule.stable_polls >= STABLE_POLLS_BEFORE_BACKOFF:
+                schedule.interval = min(
+                    schedule.interval * 2,
+                    schedule.base_interval * MAX_POLL_BACKOFF,
+                    MAX_POLL_INTERVAL,
+                )
+                schedule.stable_polls = 0
+
+        self._update_budget_factor()
+        schedule.next_due = now + schedule.interval * self._budget_factor
+        LOGGER.debug(
+            "SCHEDULER: Next poll of %s in %.0f s", device.mac, schedule.next_due - now
+        )
+
+    def record_failure(self, device: EheimDevice, now: float) -> None:
+        """Retry a device that did not answer after the shortest interval."""
+        if (schedule := self._schedule(device)) is None:
+            return
+        schedule.stable_polls = 0
+        schedule.next_due = now + MIN_POLL_INTERVAL
+
+    def request_all(self) -> None:
+        """Make every device due at the next cycle."""
+        for schedule in self._schedules.values():
+            schedule.next_due = 0.0
@@ -1,6 +1,8 @@
 """Platform for Sensor integration"""
 from __future__ import annotations
 
+import math
+import time
 from collections.abc import Callable
 from dataclasses import dataclass
 from typing import Any
@@ -14,31 +16,61 @@ from homeassistant.components.sensor import (
 )
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import UnitOfTemperature
+from homeassistant.const import Platform, UnitOfTemperature
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.helpers.typing import StateType
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from homeassistant.helpers.device_registry import format_mac
 from homeassistant.util import dt as dt_util
 
 from . import EheimDigitalDataUpdateCoordinator
+from .capabilities import capabilities_for, entity_unique_id
 from .devices import EheimDevice
-from .const import LOGGER, DOMAIN
+from .const import (
+    ATTR_CIRCUIT_BREAKER,
+    ATTR_DATA_AGE,
+    ATTR_STALE,
+    BREAKER_CLOSED,
+    CONF_DEADBAND,
+    CONF_HEARTBEAT_INTERVAL,
+    CONF_MIN_INTERVAL,
+    DEFAULT_HEARTBEAT_INTERVAL,
+    LOGGER,
+    DOMAIN,
+)
+from .models import (
+    ColorChannelValues,
+    EheimMessageData,
+    FilterData,
+    HeaterData,
+    PhData,
+)
 
 
 @dataclass
 class EheimSensorDescriptionMixin:
     """Mixin for Eheim sensor."""
 
-    value_fn: Callable[[dict[str, Any]], StateType]
+    data_type: type[EheimMessageData]
+    value_fn: Callable[[Any], StateType]
 
 
 @dataclass
 class EheimSensorDescription(SensorEntityDescription, EheimSensorDescriptionMixin):
     """Class describing Eheim sensor entities."""
 
-    attr_fn: Callable[[dict[str, Any]], dict[str, StateType]] = lambda _: {}
+    attr_fn: Callable[[Any], dict[str, StateType]] = lambda _: {}
+    # Raw payload fields the sensor reads; it is only updated when one changes
+    fields: tuple[str, ...] = ()
+    # A derived value is kept while its fields are unchanged and replaced only
+    # when it moves by more than this, so projected times do not churn
+    tolerance: float | timedelta | None = None
+    # Defaults of the options that keep jitter out of the recorder: a new state
+    # is only written once the value moved by at least the deadband and
+    # min_interval seconds passed since the last write
+    deadband: float | None = None
+    min_interval: int = 0
 
 
 SENSOR_DESCRIPTIONS: tuple[EheimSensorDescription, ...] = (
@@ -50,7 +82,11 @@ SENSOR_DESCRIPTIONS: tuple[EheimSensorDescription, ...] = (
         name="Current Temperature",
         entity_registry_enabled_default=True,
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
-        value_fn=lambda data: data.get("isTemp") / 10,
+        data_type=HeaterData,
+        fields=("isTemp",),
+        deadband=0.2,
+        min_interval=60,
+        value_fn=lambda data: data.is_temp / 10,
     ),
     EheimSensorDescription(
         key="target_temperature",
@@ -59,7 +95,9 @@ SENSOR_DESCRIPTIONS: tuple[EheimSensorDescription, ...] = (
         name="Target Temperature",
         entity_registry_enabled_default=True,
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
-        value_fn=lambda data: data.get("sollTemp") / 10,
+        data_type=HeaterData,
+        fields=("sollTemp",),
+        value_fn=lambda data: data.soll_temp / 10,
     ),
     # Filter Sensors
     EheimSensorDescription(
@@ -70,15 +108,20 @@ SENSOR_DESCRIPTIONS: tuple[EheimSensorDescription, ...] = (
         entity_registry_enabled_default=True,
         native_unit_of_measurement="d",
         state_class="total_increasing",
-        value_fn=lambda data: data.get("actualTime") / (1440 * 24),
+        data_type=FilterData,
+        fields=("actualTime",),
+        tolerance=0.1,
+        value_fn=lambda data: data.actual_time / (1440 * 24),
     ),
     EheimSensorDescription(
         key="night_mode_end_time",
         icon="mdi:clock-time-eight",
         name="Night Mode End Time",
         entity_registry_enabled_default=True,
+        data_type=FilterData,
+        fields=("end_time_night_mode",),
         value_fn=lambda data: "{:02d}:{:02d}".format(
-            *divmod(data.get("end_time_night_mode", 0), 60)
+            *divmod(data.end_time_night_mode or 0, 60)
         ),
     ),
     EheimSensorDescription(
@@ -86,8 +129,10 @@ SENSOR_DESCRIPTIONS: tuple[EheimSensorDescription, ...] = (
         icon="mdi:clock-time-six",
         name="Night Mode Start Time",
         entity_registry_enabled_default=True,
+        data_type=FilterData,
+        fields=("start_time_night_mode",),
         value_fn=lambda data: "{:02d}:{:02d}".format(
-            *divmod(data.get("start_time_night_mode", 0), 60)
+            *divmod(data.start_time_night_mode or 0, 60)
         ),
     ),
     EheimSensorDescription(
@@ -96,10 +141,12 @@ SENSOR_DESCRIPTIONS: tuple[EheimSensorDescription, ...] = (
         name="Current Speed",
         entity_registry_enabled_default=True,
         native_unit_of_measurement="%",
+        data_type=FilterData,
+        fields=("freq", "maxFreqRglOff"),
+        deadband=2,
+        min_interval=60,
         value_fn=lambda data: int(
-            data.get("freq") / data.get("maxFreqRglOff") * 100
-            if data.get("maxFreqRglOff")
-            else 0
+            data.freq / data.max_freq_rgl_off * 100 if data.max_freq_rgl_off else 0
         ),
     ),
     EheimSensorDescription(
@@ -108,8 +155,11 @@ SENSOR_DESCRIPTIONS: tuple[EheimSensorDescription, ...] = (
         icon="mdi:wrench-clock",
         name="Next Service",
         entity_registry_enabled_default=True,
+        data_type=FilterData,
+        fields=("serviceHour",),
+        tolerance=timedelta(hours=1),
         value_fn=lambda data: (
-            dt_util.utcnow() + timedelta(hours=data.get("serviceHour", 0))
+            dt_util.utcnow() + timedelta(hours=data.service_hour or 0)
         ),
     ),
     EheimSensorDescription(
@@ -118,7 +168,9 @@ SENSOR_DESCRIPTIONS: tuple[EheimSensorDescription, ...] = (
         name="Filter Turn Off Time",
         entity_registry_enabled_default=True,
         native_unit_of_measurement="s",
-        value_fn=lambda data: data.get("turnOffTime"),
+        data_type=FilterData,
+        fields=("turnOffTime",),
+        value_fn=lambda data: data.turn_off_time,
     ),
     # LED Control Sensors
     EheimSensorDescription(
@@ -127,8 +179,11 @@ SENSOR_DESCRIPTIONS: tuple[EheimSensorDescription, ...] = (
         name="Brightness",
         entity_registry_enabled_default=True,
         native_unit_of_measurement="%",
+        data_type=ColorChannelValues,
+        fields=("currentValues",),
+        deadband=2,
         value_fn=lambda data: round(
-            sum(data["currentValues"]) / len(data["currentValues"])
+            sum(data.current_values) / len(data.current_values)
         ),
     ),
     EheimSensorDescription(
@@ -137,7 +192,10 @@ SENSOR_DESCRIPTIONS: tuple[EheimSensorDescription, ...] = (
         name="White Brightness",
         entity_registry_enabled_default=True,
         native_unit_of_measurement="%",
-        value_fn=lambda data: data.get("currentValues")[0],
+        data_type=ColorChannelValues,
+        fields=("currentValues",),
+        deadband=2,
+        value_fn=lambda data: data.current_values[0],
     ),
     EheimSensorDescription(
         key="ccv_brightness_plants_gold",
@@ -145,7 +203,10 @@ SENSOR_DESCRIPTIONS: tuple[EheimSensorDescription, ...] = (
         name="Plants Gold Brightness",
         entity_registry_enabled_default=True,
         native_unit_of_measurement="%",
-        value_fn=lambda data: data.get("currentValues")[1],
+        data_type=ColorChannelValues,
+        fields=("currentValues",),
+        deadband=2,
+        value_fn=lambda data: data.current_values[1],
     ),
     EheimSensorDescription(
         key="ccv_brightness_royal_blue",
@@ -153,7 +214,10 @@ SENSOR_DESCRIPTIONS: tuple[EheimSensorDescription, ...] = (
         name="Royal Blue Brightness",
         entity_registry_enabled_default=True,
         native_unit_of_measurement="%",
-        value_fn=lambda data: data.get("currentValues")[2],
+        data_type=ColorChannelValues,
+        fields=("currentValues",),
+        deadband=2,
+        value_fn=lambda data: data.current_values[2],
     ),
     # PH Control Sensors
     EheimSensorDescription(
@@ -163,7 +227,11 @@ SENSOR_DESCRIPTIONS: tuple[EheimSensorDescription, ...] = (
         unit_of_measurement="",
         name="Current pH",
         entity_registry_enabled_default=True,
-        value_fn=lambda data: round((int(data["isPH"]) / 10), 1),
+        data_type=PhData,
+        fields=("isPH",),
+        deadband=0.2,
+        min_interval=60,
+        value_fn=lambda data: round((int(data.is_ph) / 10), 1),
     ),
     EheimSensorDescription(
         key="ph_target_ph",
@@ -171,7 +239,9 @@ SENSOR_DESCRIPTIONS: tuple[EheimSensorDescription, ...] = (
         device_class=SensorDeviceClass.PH,
         name="Target pH",
         entity_registry_enabled_default=True,
-        value_fn=lambda data: round((int(data["sollPH"]) / 10), 1),
+        data_type=PhData,
+        fields=("sollPH",),
+        value_fn=lambda data: round((int(data.soll_ph) / 10), 1),
     ),
     EheimSensorDescription(
         key="ph_dayStart_time",
@@ -179,8 +249,10 @@ SENSOR_DESCRIPTIONS: tuple[EheimSensorDescription, ...] = (
         device_class=SensorDeviceClass.TIMESTAMP,
         name="Day Start Time",
         entity_registry_enabled_default=True,
+        data_type=PhData,
+        fields=("dayStartT",),
         value_fn=lambda data: "{:02d}:{:02d}".format(
-            *divmod(data.get("dayStartT", 0), 60)
+            *divmod(data.day_start_time or 0, 60)
         ),
     ),
     EheimSensorDescription(
@@ -189,8 +261,10 @@ SENSOR_DESCRIPTIONS: tuple[EheimSensorDescription, ...] = (
         device_class=SensorDeviceClass.TIMESTAMP,
         name="Night Start Time",
         entity_registry_enabled_default=True,
+        data_type=PhData,
+        fields=("nightStartT",),
         value_fn=lambda data: "{:02d}:{:02d}".format(
-            *divmod(data.get("nightStartT", 0), 60)
+            *divmod(data.night_start_time or 0, 60)
         ),
     ),
     EheimSensorDescription(
@@ -199,7 +273,9 @@ SENSOR_DESCRIPTIONS: tuple[EheimSensorDescription, ...] = (
         device_class=SensorDeviceClass.CO2,
         name="kH Value",
         entity_registry_enabled_default=True,
-        value_fn=lambda data: round(data.get("kH")),
+        data_type=PhData,
+        fields=("kH",),
+        value_fn=lambda data: round(data.kh),
     ),
     EheimSensorDescription(
         key="next_ph_service",
@@ -207,38 +283,17 @@ SENSOR_DESCRIPTIONS: tuple[EheimSensorDescription, ...] = (
         icon="mdi:wrench-clock",
         name="Next pH Service",
         entity_registry_enabled_default=True,
+        data_type=PhData,
+        fields=("serviceTime",),
+        tolerance=timedelta(days=1),
         value_fn=lambda data: (
-            dt_util.utcnow() + timedelta(days=data.get("serviceTime", 0))
+            dt_util.utcnow() + timedelta(days=data.service_time or 0)
         ),
     ),
 )
 
-SENSOR_GROUPS = {
-    "heater": ["current_temperature", "target_temperature"],
-    "led_control": [
-        "ccv_brightness",
-        "ccv_brightness_white",
-        "ccv_brightness_plants_gold",
-        "ccv_brightness_royal_blue",
-    ],
-    "filter": [
-        "operating_time",
-        "night_mode_end_time",
-        "night_mode_start_time",
-        "current_speed",
-        "next_service",
-        "filter_turn_off_time",
-        "filter_turn_off_time",
-    ],
-    "ph_control": [
-        "ph_current_ph",
-        "ph_target_ph",
-        # "ph_dayStart_time",
-        # "ph_nightStart_time",
-        "kH_valve",
-        "next_ph_service",
-    ],
-    "other": [],
+SENSOR_DESCRIPTIONS_BY_KEY = {
+    description.key: description for description in SENSOR_DESCRIPTIONS
 }
 
 
@@ -252,18 +307,11 @@ async def async_setup_entry(
 
     sensors = []
     for device in coordinator.devices:
-        device_group = device.device_group
-        sensor_keys_for_group = SENSOR_GROUPS.get(device_group, [])
-
-        device_data = _get_sensor_data(coordinator.data, device.mac)
+        for key in capabilities_for(device).entities.get(Platform.SENSOR, ()):
+            description = SENSOR_DESCRIPTIONS_BY_KEY[key]
+            sensors.append(EheimSensor(coordinator, description, device))
 
-        for description in SENSOR_DESCRIPTIONS:
-            if description.key in sensor_keys_for_group:
-                sensors.append(
-                    EheimSensor(coordinator, description, device, device_data)
-                )
-
-    async_add_entities(sensors, True)
+    async_add_entities(sensors)
 
 
 class EheimSensor(CoordinatorEntity[EheimDigitalDataUpdateCoordinator], SensorEntity):
@@ -277,13 +325,26 @@ class EheimSensor(CoordinatorEntity[EheimDigitalDataUpdateCoordinator], SensorEn
         coordinator: EheimDigitalDataUpdateCoordinator,
         description: EheimSensorDescription,
         device: EheimDevice,
-        device_data: dict[str, Any],
     ) -> None:
         """Initialize the Sensor."""
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=(device.mac, description.fields))
         self.entity_description = description
-        self._sensor_data = coordinator.data[device.mac]
         self._device = device
+        # The value function failed on the latest data
+        self._value_error = False
+        # Field values the current value was derived from
+        self._inputs: tuple[Any, ...] | None = None
+        options = coordinator.entry.options
+        self._deadband = options.get(
+            CONF_DEADBAND.format(description.key), description.deadband
+        )
+        self._min_interval = options.get(
+            CONF_MIN_INTERVAL.format(description.key), description.min_interval
+        )
+        # The value, availability and attributes last written, and when
+        self._written: tuple[Any, ...] | None = None
+        self._written_at = 0.0
+        self._update_value()
         LOGGER.debug(
             "Initializing Eheim Sensor for Device: %s Entity: %s",
             self._device.mac,
@@ -291,21 +352,139 @@ class EheimSensor(CoordinatorEntity[EheimDigitalDataUpdateCoordinator], SensorEn
         )
 
     @property
-    def native_value(self) -> StateType:
-        """Return the state of the sensor."""
-        return self.entity_description.value_fn(self._sensor_data)
+    def available(self) -> bool:
+        """Return True if the device has recently reported the data of this sensor."""
+        return (
+            super().available
+            and not self._value_error
+            and self.coordinator.is_data_available(
+                self._device.mac, self.entity_description.data_type.TITLE
+            )
+        )
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Flag restored values and report the state of an unresponsive device."""
+        mac = self._device.mac
+        title = self.entity_description.data_type.TITLE
+        attributes = {}
+        entry = self.coordinator.data.entry(mac, title)
+        if entry is not None and entry.stale:
+            attributes[ATTR_STALE] = True
+        if (age := self.coordinator.data_age(mac, title)) is not None:
+            attributes[ATTR_DATA_AGE] = age
+        breaker = self.coordinator.websocket_client.breaker_state(mac)
+        if breaker != BREAKER_CLOSED:
+            attributes[ATTR_CIRCUIT_BREAKER] = breaker
+        return attributes or None
 
     @property
     def unique_id(self) -> str:
         """Return the unique ID for this sensor."""
-        return f"{self._device.model.lower().replace(' ', '_')}_{format_mac(self._device.mac).replace(':','_')}_{self.entity_description.key}"
+        return entity_unique_id(self._device, self.entity_description.key)
+
+    async def async_added_to_hass(self) -> None:
+        """Write the latest state on a heartbeat if updates are filtered."""
+        await super().async_added_to_hass()
+        if self._deadband is not None:
+            heartbeat = self.coordinator.entry.options.get(
+                CONF_HEARTBEAT_INTERVAL, DEFAULT_HEARTBEAT_INTERVAL
+            )
+            self.async_on_remove(
+                async_track_time_interval(
+                    self.hass, self._async_heartbeat, timedelta(seconds=heartbeat)
+                )
+            )
 
     @callback
     def _handle_coordinator_update(self) -> None:
         "Handle updated data from the coordinator." ""
-        self._sensor_data = self.coordinator.data[self._device.mac]
+        self._update_value()
+        if self._is_significant():
+            self._async_write_state()
+
+    @callback
+    def _async_heartbeat(self, _now: datetime) -> None:
+        """Write the latest state, significant or not."""
+        self._async_write_state()
+
+    @callback
+    def _async_write_state(self) -> None:
+        """Write the state and remember what was written."""
+        self._written = (
+            self._attr_native_value,
+            self.available,
+            self.extra_state_attributes,
+        )
+        self._written_at = time.monotonic()
         self.async_write_ha_state()
 
+    def _is_significant(self) -> bool:
+        """Return True if the state differs enough from the last write."""
+        if self._deadband is None or self._written is None:
+            return True
+        value, available, attributes = self._written
+        current = self._attr_native_value
+        if (
+            value is None
+            or current is None
+            or available != self.available
+            or attributes != self.extra_state_attributes
+        ):
+            return True
+        if time.monotonic() - self._written_at < self._min_interval:
+            return False
+        delta = abs(current - value)
+        return delta >= self._deadband or math.isclose(delta, self._deadband)
+
+    def _update_value(self) -> None:
+        """Compute the value of the sensor once from the latest device data."""
+        description = self.entity_description
+        data = self.coordinator.data.get_data(self._device.mac, description.data_type)
+        if data is None:
+            self._attr_native_value = None
+            self._value_error = False
+            self._inputs = None
+            return
+
+        inputs = None
+        if description.tolerance is not None:
+            inputs = tuple(
+                getattr(data, name)
+                for name, raw in description.data_type.FIELDS.items()
+                if raw in description.fields
+            )
+            # Anchored to the last change of the fields it is derived from
+            if inputs == self._inputs and not self._value_error:
+                return
+        try:
+            value = description.value_fn(data)
+        except (ArithmeticError, IndexError, TypeError, ValueError) as error:
+            if not self._value_error:
+                LOGGER.warning(
+                    "Could not read %s of device %s from %s: %s",
+                    description.key,
+                    self._device.mac,
+                    data,
+                    error,
+                )
+            self._attr_native_value = None
+            self._value_error = True
+            self._inputs = None
+            return
+
+        previous = self._attr_native_value
+        if (
+            description.tolerance is not None
+            and previous is not None
+            and value is not None
+            and abs(value - previous) <= description.tolerance
+        ):
+            value = previous
+        self._attr_native_value = value
+        self._value_error = False
+        self._inputs = inputs
+
     @property
     def device_info(self):
         return {
@@ -314,20 +493,3 @@ class EheimSensor(CoordinatorEntity[EheimDigitalDataUpdateCoordinator], SensorEn
             "manufacturer": "Eheim",
             "model": self._device.model,
         }
-
-
-def _get_sensor_data(sensors: dict[str, Any], mac_address: str) -> Any:
-    """Get the sensor data for a sensor type."""
-    if sensors is None:
-        LOGGER.warning("Sensor data is None when trying to fetch %s", mac_address)
-        return None
-
-    # Form the key using device_type and mac_address
-    key = mac_address
-
-    data = sensors.get(key)
-    if data is None:
-        LOGGER.warning("No data found for key: %s", key)
-    else:
-        LOGGER.debug("Received sensor data for %s: %s", key, data)
-    return data
@@ -1,11 +1,46 @@
 """EHEIM WebSocket Client."""
-import json
 import websockets
 import asyncio
-from typing import Dict
+import time
+from collections import defaultdict, deque
+from collections.abc import Callable
+from functools import partial
+from typing import Any
+
+from async_timeout import timeout
+
+from .breaker import EheimCircuitBreaker
+from .capabilities import DataRequest, capabilities_for
+from .command_queue import EheimCommandDroppedError, EheimCommandQueue, QueueCounters
+from .connection import ConnectionMetrics, EheimConnectionError, EheimConnectionManager
+from .codec import EheimMessage, dumps, encode_request
 from .devices import EheimDevice
 
-from .const import LOGGER
+from .const import (
+    BREAKER_CLOSED,
+    COALESCED_COMMANDS,
+    COMMAND_BURST,
+    COMMAND_QUEUE_SIZE,
+    COMMAND_RATE,
+    COMMAND_INVALIDATES,
+    DISCOVERY_TIMEOUT,
+    DROP_OLDEST,
+    KEEP_ALIVE_TITLES,
+    LOGGER,
+    MAX_IN_FLIGHT_PER_DEVICE,
+    MAX_IN_FLIGHT_REQUESTS,
+    PING_INTERVAL,
+    PING_TIMEOUT,
+    PRIORITY_COMMAND,
+    PRIORITY_POLL,
+    REFRESH_TIER_TTL,
+    REPLY_REUSE_WINDOW,
+    REQUEST_TIMEOUT,
+    RESPONSE_TITLES,
+)
+
+# Reply titles and the request that produces them
+REQUEST_TITLES = {reply: request for request, reply in RESPONSE_TITLES.items()}
 
 
 class EheimDigitalWebSocketClientError(Exception):
@@ -16,139 +51,252 @@ class EheimDigitalWebSocketClientCommunicationError(EheimDigitalWebSocketClientE
     """Exception to indicate a communication error."""
 
 
+class EheimDigitalWebSocketClientTimeoutError(
+    EheimDigitalWebSocketClientCommunicationError
+):
+    """Exception to indicate that a device did not answer in time."""
+
+
+class EheimDigitalWebSocketClientDeviceUnavailableError(
+    EheimDigitalWebSocketClientCommunicationError
+):
+    """Exception to indicate that requests to a device are paused."""
+
+
 class EheimDigitalWebSocketClient:
     """EHEIM WebSocket Client."""
 
-    def __init__(self, host: str) -> None:
+    def __init__(
+        self,
+        host: str,
+        max_in_flight: int = MAX_IN_FLIGHT_REQUESTS,
+        max_in_flight_per_device: int = MAX_IN_FLIGHT_PER_DEVICE,
+        request_timeout: float = REQUEST_TIMEOUT,
+        ping_interval: float | None = PING_INTERVAL,
+        ping_timeout: float | None = PING_TIMEOUT,
+        queue_size: int = COMMAND_QUEUE_SIZE,
+        command_rate: float = COMMAND_RATE,
+        command_burst: int = COMMAND_BURST,
+        drop_policy: str = DROP_OLDEST,
+        reply_reuse_window: float = REPLY_REUSE_WINDOW,
+    ) -> None:
         """EHEIM WebSocket Client initialization."""
         self._host = host
+        self._request_timeout = request_timeout
+        self._reply_reuse_window = reply_reuse_window
         self._url = f"ws://{host}/ws"
-        self._websocket = None
+        self._connection = EheimConnectionManager(
+            self._url,
+            self._handle_handshake,
+            self._handle_message,
+            self._fail_pending,
+            ping_interval,
+            ping_timeout,
+        )
         self._devices = None
         self._client_list = None
-        self._lock = asyncio.Lock()
-        self.buffer = []
-        self.send_interval = 1  # 1 second
-        self.max_retries = 3  # Maximum number of reconnection attempts
-        self.heartbeat_interval = 30  # 30 seconds
+        # Outstanding requests keyed by (target MAC, expected reply title)
+        self._pending: dict[tuple[str, str], deque[asyncio.Future]] = {}
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._device_in_flight: defaultdict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(max_in_flight_per_device)
+        )
+        self._listeners: list[Callable[[EheimMessage], None]] = []
+        self._breakers: dict[str, EheimCircuitBreaker] = {}
+        # Outstanding data requests shared by identical callers, keyed by
+        # (request title, MAC), and recent replies per MAC and request title
+        self._shared_requests: dict[tuple[str, str], asyncio.Task] = {}
+        self._recent_replies: dict[str, dict[str, tuple[float, dict[str, Any]]]] = {}
+        # Cached settings responses keyed by (MAC, request title)
+        self._response_cache: dict[tuple[str, str], tuple[float, dict[str, Any]]] = {}
+        # Every outbound frame except keep-alive replies goes through the queue
+        self._commands = EheimCommandQueue(
+            self._connection.send, queue_size, command_rate, command_burst, drop_policy
+        )
 
     @property
-    def is_connected(self):
-        return self._websocket is not None and not self._websocket.closed
+    def client_list(self) -> list[str]:
+        """Return the MACs of the clients announced by the master."""
+        return self._client_list or []
 
-    async def reconnect(self):
-        """Attempt to reconnect to the server."""
-        retry_count = 0
-        while not self.is_connected and retry_count < self.max_retries:
-            try:
-                await self.connect_websocket()
-                LOGGER.info(f"Reconnected on attempt {retry_count + 1}")
-                return
-            except Exception as e:
-                LOGGER.error(f"Reconnection attempt {retry_count + 1} failed: {e}")
-                retry_count += 1
-                await asyncio.sleep(5)
-        LOGGER.error("Failed to reconnect after max retries")
-
-    async def start_heartbeat(self):
-        """Send a heartbeat message at regular intervals."""
-        while self.is_connected:
-            await self._send_message({"title": "GET_MESH_NETWORK", "to": "MASTER"})
-            await asyncio.sleep(self.heartbeat_interval)
-
-    async def buffered_send(self, message: Dict):
-        """Add the message to the buffer."""
-        self.buffer.append(message)
-
-    async def process_buffer(self):
-        """Process and send messages from the buffer at regular intervals."""
-        while self.is_connected:
-            if self.buffer:
-                message = self.buffer.pop(0)
-                await self._send_message(message)
-            await asyncio.sleep(self.send_interval)
+    @property
+    def is_connected(self) -> bool:
+        """Return True if requests can be sent."""
+        return self._connection.is_ready
+
+    @property
+    def connection_state(self) -> str:
+        """Return the state of the connection to the master."""
+        return self._connection.state
+
+    @property
+    def connection_metrics(self) -> ConnectionMetrics:
+        """Return the reconnect and downtime counters of the connection."""
+        return self._connection.metrics
+
+    @property
+    def queue_counters(self) -> QueueCounters:
+        """Return the counters of the outbound queue."""
+        return self._commands.counters
+
+    async def refresh_topology(self) -> list[str]:
+        """Ask the master for the clients of its mesh network."""
+        await self._send_message(
+            {"title": "GET_MESH_NETWORK", "to": "MASTER", "from": "USER"}
+        )
+        return self.client_list
 
     async def check_connection(self):
-        """Check the WebSocket connection and reconnect if necessary."""
+        """Fail fast while the connection is not ready.
+
+        Reconnecting is left to the connection manager in the background.
+        """
         if not self.is_connected:
-            await self.reconnect()
+            raise EheimDigitalWebSocketClientCommunicationError(
+                f"WebSocket is {self.connection_state}"
+            )
 
     async def connect_websocket(self) -> None:
-        """Connect to the WebSocket server and process initial messages."""
-        async with self._lock:  # Ensure only one connection attempt at a time
-            LOGGER.debug("WEBSOCKET: Called function connect_websocket")
-            try:
-                self._websocket = await websockets.connect(
-                    self._url, subprotocols=["arduino"]
-                )  # pylint: disable=all
-
-                # Process the first two initial messages
-                for _ in range(2):
-                    initial_response = await self._websocket.recv()
-                    messages = json.loads(initial_response)
-                    LOGGER.debug("WEBSOCKET: Initial WebSocket Response: %s", messages)
-
-                    # Extracting and storing the client list
-                    for message in messages:
-                        if "clientList" in message:
-                            self._client_list = list(set(message["clientList"]))
-                            break
-
-                    LOGGER.debug("WEBSOCKET: Client List: %s", self._client_list)
-            except Exception as ex:
-                raise EheimDigitalWebSocketClientCommunicationError(
-                    f"Failed to connect to WebSocket: {ex}"
-                ) from ex
+        """Connect to the WebSocket server and keep the connection open."""
+        LOGGER.debug("WEBSOCKET: Called function connect_websocket")
+        try:
+            await self._connection.connect()
+        except EheimConnectionError as ex:
+            raise EheimDigitalWebSocketClientCommunicationError(str(ex)) from ex
+
+    def start(self) -> None:
+        """Connect and keep the connection open in the background."""
+        self._connection.start()
+
+    async def wait_connected(self, timeout: float) -> bool:
+        """Wait until the connection is ready, at most timeout seconds."""
+        return await self._connection.wait_ready(timeout)
 
     async def disconnect_websocket(self) -> None:
         """Disconnect from the WebSocket server."""
-        async with self._lock:  # Ensure only one disconnection attempt at a time
-            LOGGER.debug("WEBSOCKET: Called function disconnect_websocket")
-            if self._websocket:
-                await self._websocket.close()
-                self._websocket = None
+        LOGGER.debug("WEBSOCKET: Called function disconnect_websocket")
+        self._commands.clear()
+        self._recent_replies.clear()
+        await self._connection.stop()
+
+    def _handle_handshake(self, messages: list[EheimMessage]) -> None:
+        """Take the client list from the initial messages of a connection."""
+        for message in messages:
+            if "clientList" in message.payload:
+                self._update_client_list(message.payload["clientList"])
+                break
+        LOGGER.debug("WEBSOCKET: Client List: %s", self._client_list)
+
+    def _update_client_list(self, client_list: list[str]) -> None:
+        """Store the clients announced by the master and re-admit them."""
+        self._client_list = list(dict.fromkeys(client_list))
+        for mac in self._client_list:
+            if (breaker := self._breakers.get(mac)) is not None:
+                breaker.record_success()
+
+    def breaker_state(self, mac_address: str) -> str:
+        """Return the circuit breaker state of a device."""
+        if (breaker := self._breakers.get(mac_address)) is None:
+            return BREAKER_CLOSED
+        return breaker.state
+
+    def add_listener(
+        self, listener: Callable[[EheimMessage], None]
+    ) -> Callable[[], None]:
+        """Register a callback for unsolicited frames and return its remover."""
+        self._listeners.append(listener)
+
+        def remove_listener() -> None:
+            self._listeners.remove(listener)
+
+        return remove_listener
+
+    def _fail_pending(self) -> None:
+        """Fail every request still waiting when the connection is lost."""
+        for futures in self._pending.values():
+            for future in futures:
+                if not future.done():
+                    future.set_exception(
+                        EheimDigitalWebSocketClientCommunicationError(
+                            "Connection closed while waiting for a response"
+                        )
+                    )
+
+    def _handle_message(self, message: EheimMessage) -> None:
+        """Resolve the matching request with its reply or hand the frame to listeners."""
+        title = message.title
+        if title in KEEP_ALIVE_TITLES:
+            LOGGER.debug("WEBSOCKET: Received keep-alive")
+            return
+
+        # Any frame from a device or the mesh it is listed in re-admits it
+        if (breaker := self._breakers.get(message.sender)) is not None:
+            breaker.record_success()
+        if "clientList" in message.payload:
+            self._update_client_list(message.payload["clientList"])
+
+        # Requests addressed to "MASTER" are answered from the master's own MAC
+        for key in ((message.sender, title), ("MASTER", title)):
+            futures = self._pending.get(key)
+            while futures:
+                future = futures.popleft()
+                if not future.done():
+                    LOGGER.debug("WEBSOCKET: Received response: %s", message.payload)
+                    future.set_result(message.payload)
+                    return
+
+        LOGGER.debug("WEBSOCKET: Received unsolicited message: %s", message.payload)
+        # A pushed settings frame means the cached response is outdated
+        self.invalidate_cache(message.sender, REQUEST_TITLES.get(title))
+        for listener in list(self._listeners):
+            try:
+                listener(message)
+            except Exception:  # pylint: disable=broad-except
+                LOGGER.exception("WEBSOCKET: Error in message listener")
 
     async def fetch_devices(self) -> list[EheimDevice]:
-        """Fetch devices information and data from the WebSocket."""
+        """Fetch devices information and data from the WebSocket.
+
+        Clients that do not answer within DISCOVERY_TIMEOUT are left out.
+        """
         LOGGER.debug("WEBSOCKET: Called function fetch_devices")
 
         # Connect to the WebSocket if not connected
-        if self._websocket is None:
+        if not self.is_connected:
             await self.connect_websocket()
 
-        # Initialize devices as an empty list
-        devices = []
-
-        # Iterate through the unique clients, send requests for device information, and process the responses
-        async with self._lock:
-            for client in self._client_list:
-                request_message = (
-                    f'{{"title": "GET_USRDTA","to": "{client}","from": "USER"}}'
-                )
-                LOGGER.debug(
-                    "WEBSOCKET: Sending Device Client: %s Request Message: %s, ",
-                    client,
-                    request_message,
-                )
-                await self._websocket.send(request_message)
-                response = await self._websocket.recv()
+        # Ask every client at once; the replies are matched by their sender MAC
+        LOGGER.debug("WEBSOCKET: Sending GET_USRDTA to clients: %s", self._client_list)
+        requests = {
+            client: asyncio.create_task(self._send_request("GET_USRDTA", client))
+            for client in self.client_list
+        }
+        pending = set()
+        if requests:
+            _, pending = await asyncio.wait(
+                requests.values(), timeout=DISCOVERY_TIMEOUT
+            )
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
 
-                messages = json.loads(response)
-                LOGGER.debug(
-                    "WEBSOCKET: Receiving Device Client: %s Response: %s",
+        devices = []
+        for client, task in requests.items():
+            if task.cancelled() or task.exception() is not None:
+                LOGGER.warning(
+                    "WEBSOCKET: Device Client %s did not answer GET_USRDTA: %s",
                     client,
-                    messages,
+                    "timeout" if task.cancelled() else task.exception(),
                 )
+                continue
+            message = task.result()
+            LOGGER.debug(
+                "WEBSOCKET: Receiving Device Client: %s Response: %s", client, message
+            )
 
-                # Process the response and extract the device information
-                if isinstance(messages, list):
-                    for message in messages:
-                        if message["title"] == "USRDTA":
-                            device = EheimDevice(message)
-                            devices.append(device)
-                elif isinstance(messages, dict) and messages["title"] == "USRDTA":
-                    device = EheimDevice(messages)
-                    devices.append(device)
+            # Process the response and extract the device information
+            if message.get("title") == "USRDTA":
+                devices.append(EheimDevice.from_payload(message))
 
         LOGGER.debug("WEBSOCKET: Devices: %s", devices)
 
@@ -168,31 +316,164 @@ class EheimDigitalWebSocketClient:
         return devices
 
     # Send Request/Command to Device
-    async def _send_message(self, message):
-        """Send a specific message to the device and wait for its response."""
+    async def _send_message(
+        self, message, message_str: str | None = None
+    ) -> dict[str, Any] | None:
+        """Send a specific message to the device and wait for its response.
+
+        Requests are correlated with their reply by target MAC and reply title,
+        so any number of them can share the connection, and fail with
+        EheimDigitalWebSocketClientTimeoutError if the reply does not arrive
+        within the request timeout. Commands without a known reply title are
+        sent without waiting and return None. An already encoded message_str
+        is sent as is.
+        """
         await self.check_connection()
-        async with self._lock:  # Ensure only one request is active at a time
-            if self._websocket is None:
-                await self.connect_websocket()
-
-            message_str = json.dumps(message)
-            await self._websocket.send(message_str)
-            LOGGER.debug("WEBSOCKET: Sent message: %s", message_str)
-
-            while True:
-                response = await self._websocket.recv()
-                response_dict = json.loads(response)
-
-                if response_dict.get("title") in ["REQ_KEEP_ALIVE", "KEEP_ALIVE"]:
-                    LOGGER.debug(
-                        "WEBSOCKET: Received keep-alive. Continuing to wait for response to: %s",
-                        message_str,
-                    )
-                    continue  # Ignore keep-alives and continue waiting for the actual response
 
-                LOGGER.debug("WEBSOCKET: Received response: %s", response)
+        target = message.get("to")
+        reply_title = RESPONSE_TITLES.get(message.get("title"))
+        self.invalidate_cache(target, COMMAND_INVALIDATES.get(message.get("title")))
+        if message_str is None:
+            message_str = dumps(message)
+        if reply_title is None:
+            # Commands await no reply, so they go to the queue right away
+            # instead of waiting for a free in-flight slot behind polls
+            self._recent_replies.pop(target, None)
+            coalesce_key = None
+            if message.get("title") in COALESCED_COMMANDS:
+                coalesce_key = (message["title"], target)
+            await self._send_frame(message_str, PRIORITY_COMMAND, coalesce_key)
+            LOGGER.debug("WEBSOCKET: Sent command: %s", message_str)
+            return None
+
+        breaker = None
+        if target != "MASTER":
+            breaker = self._breakers.get(target)
+            if breaker is None:
+                breaker = self._breakers[target] = EheimCircuitBreaker(target)
+            if not breaker.allow_request(time.monotonic()):
+                raise EheimDigitalWebSocketClientDeviceUnavailableError(
+                    f"Requests to {target} are paused, circuit breaker is "
+                    f"{breaker.state}"
+                )
+        async with self._in_flight, self._device_in_flight[target]:
+            key = (target, reply_title)
+            future = asyncio.get_running_loop().create_future()
+            futures = self._pending.setdefault(key, deque())
+            futures.append(future)
+            try:
+                await self._send_frame(message_str)
+                LOGGER.debug("WEBSOCKET: Sent message: %s", message_str)
+
+                # The reader task resolves the future with the reply
+                async with timeout(self._request_timeout):
+                    return await future
+            except asyncio.TimeoutError as ex:
+                # Probes of a device already known to be down say nothing
+                # about the connection
+                if breaker is None or breaker.state == BREAKER_CLOSED:
+                    self._connection.record_timeout(target)
+                if breaker is not None:
+                    breaker.record_failure(time.monotonic())
+                raise EheimDigitalWebSocketClientTimeoutError(
+                    f"No {reply_title} reply from {target} "
+                    f"within {self._request_timeout} s"
+                ) from ex
+            except EheimDigitalWebSocketClientCommunicationError:
+                # A dropped frame or lost connection says nothing about the
+                # device, only a missing reply counts against its breaker
+                if breaker is not None:
+                    breaker.abort_probe()
+                raise
+            finally:
+                if future in futures:
+                    futures.remove(future)
+                if not futures and self._pending.get(key) is futures:
+                    del self._pending[key]
+
+    async def _send_frame(
+        self,
+        message_str: str,
+        priority: int = PRIORITY_POLL,
+        coalesce_key: tuple[str, str] | None = None,
+    ) -> None:
+        """Queue an encoded frame and wait until it was sent."""
+        try:
+            await self._commands.send(message_str, priority, coalesce_key)
+        except (
+            EheimCommandDroppedError,
+            EheimConnectionError,
+            websockets.ConnectionClosed,
+        ) as ex:
+            raise EheimDigitalWebSocketClientCommunicationError(
+                f"Failed to send: {ex}"
+            ) from ex
+
+    async def _send_request(self, title: str, mac_address: str) -> dict[str, Any]:
+        """Send a data request, reusing its encoded frame.
+
+        Concurrent identical requests share one round trip, and a reply
+        received within the reply reuse window is returned as is.
+        """
+        recent = self._recent_replies.get(mac_address, {}).get(title)
+        if recent is not None and (
+            time.monotonic() - recent[0] < self._reply_reuse_window
+        ):
+            LOGGER.debug("WEBSOCKET: Reusing %s reply of %s", title, mac_address)
+            return recent[1]
+
+        key = (title, mac_address)
+        if (task := self._shared_requests.get(key)) is None:
+            task = asyncio.create_task(
+                self._send_message(
+                    {"title": title, "to": mac_address, "from": "USER"},
+                    encode_request(title, mac_address),
+                )
+            )
+            self._shared_requests[key] = task
+            task.add_done_callback(partial(self._finish_shared_request, key))
+        else:
+            LOGGER.debug("WEBSOCKET: Joining in-flight %s to %s", title, mac_address)
+        # A cancelled caller must not cancel the request of the others
+        return await asyncio.shield(task)
+
+    def _finish_shared_request(self, key: tuple[str, str], task: asyncio.Task) -> None:
+        """Forget a finished shared request and remember its reply."""
+        if self._shared_requests.get(key) is task:
+            del self._shared_requests[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        if (reply := task.result()) is not None:
+            title, mac_address = key
+            self._recent_replies.setdefault(mac_address, {})[title] = (
+                time.monotonic(),
+                reply,
+            )
+
+    def invalidate_cache(self, mac_address: str | None, request_title: str | None):
+        """Drop the cached response of a request for a device."""
+        self._recent_replies.get(mac_address, {}).pop(request_title, None)
+        if self._response_cache.pop((mac_address, request_title), None):
+            LOGGER.debug(
+                "WEBSOCKET: Invalidated cached %s for device %s",
+                request_title,
+                mac_address,
+            )
+
+    async def _request(self, request: DataRequest, mac_address: str) -> dict[str, Any]:
+        """Send a data request, serving settings from the cache while fresh."""
+        ttl = REFRESH_TIER_TTL[request.tier]
+        key = (mac_address, request.title)
+        if ttl and (cached := self._response_cache.get(key)):
+            received, response = cached
+            if time.monotonic() - received < ttl:
                 return response
 
+        response = await self._send_request(request.title, mac_address)
+        if ttl and response is not None:
+            self._response_cache[key] = (time.monotonic(), response)
+        return response
+
     # LED Specific Functions
     async def turn_light_on(self, mac_address: str):
         """Turn the light on."""
@@ -217,9 +498,7 @@ class EheimDigitalWebSocketClient:
     # Acclimation Specific Functions
     async def get_acclimation_settings(self, mac_address: str):
         """Request acclimation settings for the LED."""
-        data = {"title": "GET_ACCL", "to": mac_address, "from": "USER"}
-        response = await self._send_message(data)
-        return response
+        return await self._send_request("GET_ACCL", mac_address)
 
     async def set_acclimation_settings(
         self,
@@ -238,7 +517,7 @@ class EheimDigitalWebSocketClient:
             "intensityReduction": intensity_reduction,
             "currentAcclDay": current_accl_day,
             "acclActive": accl_active,
-            "Pause": accl_pause,
+            "pause": accl_pause,
             "from": "USER",
         }
         response = await self._send_message(data)
@@ -247,16 +526,12 @@ class EheimDigitalWebSocketClient:
     # Dynamic Cycle Specific Functions
     async def get_dynamic_cycle_settings(self, mac_address: str):
         """Request dynamic cycle settings for the LED."""
-        data = {"title": "GET_DYCL", "to": mac_address, "from": "USER"}
-        response = await self._send_message(data)
-        return response
+        return await self._send_request("GET_DYCL", mac_address)
 
     # Color Channel Specific Functions
     async def get_color_channel_values(self, mac_address: str):
         """Request color channel values for the LED."""
-        data = {"title": "REQ_CCV", "to": mac_address, "from": "USER"}
-        response = await self._send_message(data)
-        return response
+        return await self._send_request("REQ_CCV", mac_address)
 
     async def set_color_channel_values(self, mac_address: str, current_values: list):
         """Set color channel values for the LED."""
@@ -272,9 +547,7 @@ class EheimDigitalWebSocketClient:
     # Moon Phase Specific Functions
     async def get_moon_phase(self, mac_address: str):
         """Request moon phase settings for the LED."""
-        data = {"title": "GET_MOON", "to": mac_address, "from": "USER"}
-        response = await self._send_message(data)
-        return response
+        return await self._send_request("GET_MOON", mac_address)
 
     async def set_moon_phase(self, mac_address: str, moon_phase: int):
         """Set moon phase settings for the LED."""
@@ -287,81 +560,115 @@ class EheimDigitalWebSocketClient:
         response = await self._send_message(data)
         return response
 
+    async def set_moonlight_settings(
+        self,
+        mac_address: str,
+        min_moonlight: int,
+        max_moonlight: int,
+        moonlight_active: bool,
+        moonlight_cycle: bool,
+        moon_color: int,
+    ):
+        """Set moonlight settings for the LED."""
+        data = {
+            "title": "MOON",
+            "to": mac_address,
+            "minmoonlight": min_moonlight,
+            "maxmoonlight": max_moonlight,
+            "moonlightActive": moonlight_active,
+            "moonlightCycle": moonlight_cycle,
+            "moonColor": moon_color,
+            "from": "USER",
+        }
+        response = await self._send_message(data)
+        return response
+
     # Cloud Specific Functions
     async def get_cloud_settings(self, mac_address: str):
         """Request cloud settings for the LED."""
-        data = {"title": "GET_CLOUD", "to": mac_address, "from": "USER"}
+        return await self._send_request("GET_CLOUD", mac_address)
+
+    async def set_cloud_settings(
+        self,
+        mac_address: str,
+        probability: int,
+        max_amount: int,
+        min_intensity: int,
+        max_intensity: int,
+        min_duration: int,
+        max_duration: int,
+        cloud_active: bool,
+    ):
+        """Set cloud settings for the LED."""
+        data = {
+            "title": "CLOUD",
+            "to": mac_address,
+            "probability": probability,
+            "maxAmount": max_amount,
+            "minIntensity": min_intensity,
+            "maxIntensity": max_intensity,
+            "minDuration": min_duration,
+            "maxDuration": max_duration,
+            "cloudActive": cloud_active,
+            "mode": 2,
+            "from": "USER",
+        }
         response = await self._send_message(data)
         return response
 
     # Description Specific Functions
     async def get_description(self, mac_address: str):
         """Request description for the LED."""
-        data = {"title": "GET_DSCRPTN", "to": mac_address, "from": "USER"}
-        response = await self._send_message(data)
-        return response
+        return await self._send_request("GET_DSCRPTN", mac_address)
 
     # Filter Specific Functions
     async def get_filter_data(self, mac_address: str):
         """Request filter data for the LED."""
-        data = {"title": "GET_FILTER_DATA", "to": mac_address, "from": "USER"}
-        response = await self._send_message(data)
-        return response
+        return await self._send_request("GET_FILTER_DATA", mac_address)
 
     # Heater Specific Functions
     async def get_heater_data(self, mac_address: str):
         """Request heater data for the LED."""
-        data = {"title": "GET_EHEATER_DATA", "to": mac_address, "from": "USER"}
-        response = await self._send_message(data)
-        return response
+        return await self._send_request("GET_EHEATER_DATA", mac_address)
 
     # PH Specific Functions
     async def get_ph_data(self, mac_address: str):
         """Request ph data for the LED."""
-        data = {"title": "GET_PH_DATA", "to": mac_address, "from": "USER"}
-        response = await self._send_message(data)
-        return response
+        return await self._send_request("GET_PH_DATA", mac_address)
 
-    DEVICE_DATA_FUNCTIONS = {
-        "filter": [get_filter_data],
-        "heater": [get_heater_data],
-        "led_control": [
-            get_color_channel_values,
-            get_acclimation_settings,
-            get_dynamic_cycle_settings,
-            get_moon_phase,
-            get_cloud_settings,
-            get_description,
-        ],
-        "ph_control": [get_ph_data],
-    }
-
-    async def get_device_data(self, device: EheimDevice) -> dict:
-        """Get data for all devices."""
+    async def get_device_data(
+        self,
+        device: EheimDevice,
+        concurrent: bool = False,
+        requests: tuple[DataRequest, ...] | None = None,
+    ) -> list[dict[str, Any]]:
+        """Get the response of every data request of a device.
+
+        Without requests, all requests of the device's capabilities are sent.
+        With concurrent set, the requests are issued at once and bounded only
+        by the per-device in-flight limit.
+        """
         await self.check_connection()
-        device_type = device.device_type
-        device_group = device.device_group
-        functions = self.DEVICE_DATA_FUNCTIONS.get(device_group, [])
+        if requests is None:
+            requests = capabilities_for(device).requests
 
-        if not functions:
-            LOGGER.warning(
-                "No request functions found for device type: %s", device_type
-            )
-            return {}
+        if not requests:
+            LOGGER.debug("WEBSOCKET: No data requests for device %s", device)
+            return []
 
-        device_data = {}
-        for function in functions:
-            LOGGER.debug(
-                "WEBSOCKET: Starting function %s for device %s",
-                function.__name__,
-                device.mac,
-            )
-            response = await function(self, device.mac)
-            response_dict = json.loads(response)
-            device_data.update(response_dict)
-            LOGGER.debug(
-                "WEBSOCKET: Completed function %s for device %s",
-                function.__name__,
-                device.mac,
+        if concurrent:
+            responses = await asyncio.gather(
+                *(self._request(request, device.mac) for request in requests)
             )
-        return device_data
+        else:
+            responses = []
+            for request in requests:
+                LOGGER.debug(
+                    "WEBSOCKET: Starting %s for device %s", request.title, device.mac
+                )
+                responses.append(await self._request(request, device.mac))
+                LOGGER.debug(
+                    "WEBSOCKET: Completed %s for device %s", request.title, device.mac
+                )
+
+        return [response for response in responses if response]
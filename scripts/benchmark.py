@@ -0,0 +1,298 @@
+"""Poll-cycle benchmark for the EHEIM Digital integration.
+
+Drives EheimDigitalWebSocketClient and EheimDigitalDataUpdateCoordinator
+against the in-process master simulator, sweeping device count, per-hop
+latency and fetch strategy. Results are written as JSON so a run can be kept
+as a baseline and later runs can be checked against it.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from eheim_simulator import EheimMasterSimulator  # noqa: E402
+from homeassistant.config_entries import ConfigEntry  # noqa: E402
+from homeassistant.const import CONF_IP_ADDRESS  # noqa: E402
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.helpers import entity_registry as er  # noqa: E402
+
+from custom_components.eheim_digital.const import DOMAIN  # noqa: E402
+from custom_components.eheim_digital.coordinator import (  # noqa: E402
+    EheimDigitalDataUpdateCoordinator,
+)
+from custom_components.eheim_digital.websocket import (  # noqa: E402
+    EheimDigitalWebSocketClient,
+)
+
+# One version of every polled device group: filter, heater, pH, LED
+POLLED_VERSIONS = [4, 5, 9, 15]
+STRATEGIES = ("sequential", "concurrent")
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    """Return the nearest-rank percentile of the values."""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+def _summary(durations: list[float], requests: int) -> dict[str, float]:
+    """Summarize the cycle durations of one measurement."""
+    return {
+        "p50_ms": _percentile(durations, 50) * 1000,
+        "p95_ms": _percentile(durations, 95) * 1000,
+        "p99_ms": _percentile(durations, 99) * 1000,
+        "requests_per_second": requests / sum(durations) if sum(durations) else 0.0,
+    }
+
+
+async def _measure(simulator, cycles: int, run_cycle) -> dict[str, float]:
+    """Run a cycle repeatedly and record duration, requests and allocations."""
+    await run_cycle()  # Warm up caches and connection
+    durations = []
+    peaks = []
+    blocks = []
+    requests_before = simulator.requests_received
+    for _ in range(cycles):
+        tracemalloc.reset_peak()
+        traced_before = tracemalloc.get_traced_memory()[0]
+        blocks_before = sys.getallocatedblocks()
+        start = time.perf_counter()
+        await run_cycle()
+        durations.append(time.perf_counter() - start)
+        peaks.append(tracemalloc.get_traced_memory()[1] - traced_before)
+        blocks.append(sys.getallocatedblocks() - blocks_before)
+    result = _summary(durations, simulator.requests_received - requests_before)
+    result["requests_per_cycle"] = (
+        simulator.requests_received - requests_before
+    ) / cycles
+    result["alloc_peak_bytes"] = _percentile(peaks, 50)
+    result["alloc_net_blocks"] = _percentile(blocks, 50)
+    return result
+
+
+async def _bench_case(
+    device_count: int, latency: float, jitter: float, strategy: str, cycles: int
+) -> dict[str, Any]:
+    """Benchmark one device count, latency and strategy combination."""
+    simulator = EheimMasterSimulator(
+        devices_per_type=math.ceil(device_count / len(POLLED_VERSIONS)),
+        versions=POLLED_VERSIONS,
+        latency=latency,
+        jitter=jitter,
+        seed=0,
+    )
+    # Interleave the groups and keep exactly device_count devices
+    macs = sorted(simulator.devices, key=lambda mac: (mac[-5:], mac))[:device_count]
+    simulator.devices = {mac: simulator.devices[mac] for mac in macs}
+    concurrent = strategy == "concurrent"
+
+    async with simulator:
+        # Measure round trips, not replies reused between back-to-back cycles
+        client = EheimDigitalWebSocketClient(simulator.host, reply_reuse_window=0)
+        start = time.perf_counter()
+        devices = await client.fetch_devices()
+        discovery = time.perf_counter() - start
+
+        async def client_cycle() -> None:
+            if concurrent:
+                await asyncio.gather(
+                    *(client.get_device_data(device, True) for device in devices)
+                )
+            else:
+                for device in devices:
+                    await client.get_device_data(device)
+
+        hass = HomeAssistant()
+        # An empty entity registry, so every request has an enabled consumer
+        hass.config.config_dir = tempfile.mkdtemp()
+        await er.async_load(hass)
+        entry = ConfigEntry(
+            1, DOMAIN, "benchmark", {CONF_IP_ADDRESS: simulator.host}, "user"
+        )
+        coordinator = EheimDigitalDataUpdateCoordinator(hass, entry, client)
+        coordinator.devices = devices
+        coordinator.concurrent_updates = concurrent
+
+        async def coordinator_cycle() -> None:
+            # Measure full polls, not the adaptive schedule
+            coordinator.scheduler.request_all()
+            await coordinator._async_update_data()
+
+        result = {
+            "device_count": len(devices),
+            "latency_ms": latency * 1000,
+            "jitter_ms": jitter * 1000,
+            "strategy": strategy,
+            "cycles": cycles,
+            "fetch_devices_ms": discovery * 1000,
+            "get_device_data": await _measure(simulator, cycles, client_cycle),
+            "coordinator_update": await _measure(simulator, cycles, coordinator_cycle),
+            "command_queue": asdict(client.queue_counters),
+        }
+        await client.disconnect_websocket()
+    return result
+
+
+async def _run(args: argparse.Namespace) -> dict[str, Any]:
+    """Run the full sweep."""
+    tracemalloc.start()
+    results = []
+    for device_count in args.devices:
+        for latency in args.latency:
+            for strategy in args.strategies:
+                result = await _bench_case(
+                    device_count,
+                    latency / 1000,
+                    latency / 1000 * args.jitter,
+                    strategy,
+                    args.cycles,
+                )
+                logging.info(
+                    "%3s devices, %5.1f ms, %-10s: cycle p50 %8.1f ms, p95 %8.1f ms",
+                    device_count,
+                    latency,
+                    strategy,
+                    result["coordinator_update"]["p50_ms"],
+                    result["coordinator_update"]["p95_ms"],
+                )
+                results.append(result)
+    tracemalloc.stop()
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def _regressions(
+    report: dict[str, Any], baseline: dict[str, Any], tolerance: float
+) -> list[str]:
+    """Return the cases whose p95 cycle time regressed beyond the tolerance."""
+    previous = {
+        (case["device_count"], case["latency_ms"], case["strategy"]): case
+        for case in baseline["results"]
+    }
+    regressions = []
+    for case in report["results"]:
+        key = (case["device_count"], case["latency_ms"], case["strategy"])
+        if key not in previous:
+            continue
+        for metric in ("get_device_data", "coordinator_update"):
+            before = previous[key][metric]["p95_ms"]
+            after = case[metric]["p95_ms"]
+            if before and after > before * (1 + tolerance):
+                regressions.append(
+                    f"{metric} {key}: p95 {before:.1f} ms -> {after:.1f} ms"
+                )
+    return regressions
+
+
+def _concurrency_shortfalls(
+    report: dict[str, Any], min_devices: int, min_speedup: float
+) -> list[str]:
+    """Return the cases where concurrent cycles are not faster enough than sequential."""
+    p50 = {
+        (case["device_count"], case["latency_ms"], case["strategy"]): case[
+            "coordinator_update"
+        ]["p50_ms"]
+        for case in report["results"]
+    }
+    shortfalls = []
+    for (device_count, latency, strategy), sequential in p50.items():
+        if strategy != "sequential" or device_count < min_devices:
+            continue
+        concurrent = p50.get((device_count, latency, "concurrent"))
+        if concurrent is None:
+            continue
+        speedup = sequential / concurrent if concurrent else math.inf
+        logging.info(
+            "%3s devices, %5.1f ms: concurrent is %.1fx faster than sequential",
+            device_count,
+            latency,
+            speedup,
+        )
+        if speedup < min_speedup:
+            shortfalls.append(
+                f"{device_count} devices, {latency:.1f} ms: speedup {speedup:.1f}x"
+            )
+    return shortfalls
+
+
+def main() -> None:
+    """Parse the command line, run the benchmark and write the report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--devices", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64]
+    )
+    parser.add_argument(
+        "--latency", type=float, nargs="+", default=[5, 20, 50], help="ms per hop"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.2, help="jitter as a fraction of latency"
+    )
+    parser.add_argument(
+        "--strategies", nargs="+", choices=STRATEGIES, default=list(STRATEGIES)
+    )
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument("--output", type=Path, help="write the JSON report here")
+    parser.add_argument("--baseline", type=Path, help="JSON report to compare with")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2, help="allowed p95 regression"
+    )
+    parser.add_argument(
+        "--min-speedup",
+        type=float,
+        default=2.0,
+        help="required concurrent speedup from --speedup-devices devices on",
+    )
+    parser.add_argument("--speedup-devices", type=int, default=64)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logging.getLogger("websockets").setLevel(logging.WARNING)
+    logging.getLogger("eheim_simulator").setLevel(logging.WARNING)
+    report = asyncio.run(_run(args))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output + "\n", encoding="utf-8")
+    else:
+        sys.stdout.write(output + "\n")
+
+    failed = False
+    if shortfalls := _concurrency_shortfalls(
+        report, args.speedup_devices, args.min_speedup
+    ):
+        for shortfall in shortfalls:
+            logging.error("Concurrency shortfall: %s", shortfall)
+        failed = True
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if regressions := _regressions(report, baseline, args.tolerance):
+            for regression in regressions:
+                logging.error("Regression: %s", regression)
+            failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
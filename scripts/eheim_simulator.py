@@ -0,0 +1,422 @@
+"""Local EHEIM Digital master simulator.
+
+Serves the master's WebSocket API on localhost so EheimDigitalWebSocketClient
+can be exercised and benchmarked without real hardware. Run it with
+scripts/simulate and point the integration at the printed host.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import random
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import websockets
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from custom_components.eheim_digital.const import (  # noqa: E402
+    DEVICE_GROUPS,
+    DEVICE_VERSIONS,
+)
+
+LOGGER = logging.getLogger("eheim_simulator")
+
+# Request titles and the state frame each device group answers them with
+REPLIES = {
+    "filter": {"GET_FILTER_DATA": "FILTER_DATA"},
+    "heater": {"GET_EHEATER_DATA": "HEATER_DATA"},
+    "ph_control": {"GET_PH_DATA": "PH_DATA"},
+    "led_control": {
+        "REQ_CCV": "CCV",
+        "GET_ACCL": "ACCLIMATE",
+        "GET_DYCL": "DYCL",
+        "GET_MOON": "MOON",
+        "GET_CLOUD": "CLOUD",
+        "GET_DSCRPTN": "DSCRPTN",
+    },
+}
+
+# Commands and the state frame they change
+COMMANDS = {
+    "CCV-SW": "CCV",
+    "ACCLIMATE": "ACCLIMATE",
+    "SET_MOON": "MOON",
+    "MOON": "MOON",
+    "CLOUD": "CLOUD",
+}
+
+
+def _initial_state(group: str) -> dict[str, dict[str, Any]]:
+    """Return the initial state frames of a device group."""
+    if group == "filter":
+        return {
+            "FILTER_DATA": {
+                "filterActive": 1,
+                "freq": 4500,
+                "maxFreqRglOff": 6000,
+                "actualTime": 43200,
+                "serviceHour": 2160,
+                "turnOffTime": 0,
+                "pumpMode": 1,
+                "start_time_night_mode": 1320,
+                "end_time_night_mode": 420,
+            }
+        }
+    if group == "heater":
+        return {
+            "HEATER_DATA": {
+                "isTemp": 248,
+                "sollTemp": 250,
+                "isHeating": 1,
+                "alert_State": 0,
+                "active": 1,
+                "mode": 0,
+            }
+        }
+    if group == "ph_control":
+        return {
+            "PH_DATA": {
+                "isPH": 68,
+                "sollPH": 68,
+                "kH": 6,
+                "serviceTime": 120,
+                "acclimatization": 0,
+                "active": 1,
+                "alertState": 0,
+                "valveIsActive": 0,
+                "dayStartT": 480,
+                "nightStartT": 1200,
+            }
+        }
+    if group == "led_control":
+        return {
+            "CCV": {"currentValues": [80, 60, 40]},
+            "ACCLIMATE": {
+                "duration": 14,
+                "intensityReduction": 50,
+                "currentAcclDay": 0,
+                "acclActive": 0,
+                "pause": 0,
+            },
+            "DYCL": {"dawnStart": 480, "sunriseEnd": 540, "sunsetStart": 1200, "duskEnd": 1260},
+            "MOON": {
+                "maxmoonlight": 10,
+                "minmoonlight": 1,
+                "moonlightActive": 1,
+                "moonlightCycle": 1,
+            },
+            "CLOUD": {
+                "probability": 20,
+                "maxAmount": 10,
+                "minIntensity": 20,
+                "maxIntensity": 80,
+                "minDuration": 5,
+                "maxDuration": 30,
+                "cloudActive": 0,
+                "mode": 2,
+            },
+            "DSCRPTN": {"channels": 3, "names": ["white", "plants gold", "royal blue"]},
+        }
+    return {}
+
+
+@dataclass
+class SimulatedDevice:
+    """A device on the simulated mesh."""
+
+    mac: str
+    version: int
+    name: str
+    latency: float = 0.0
+    jitter: float = 0.0
+    drop_rate: float = 0.0
+    state: dict[str, dict[str, Any]] = field(default_factory=dict)
+
+    @property
+    def group(self) -> str:
+        """Return the device group of the simulated device."""
+        for group, versions in DEVICE_GROUPS.items():
+            if DEVICE_VERSIONS[self.version] in versions:
+                return group
+        return "other"
+
+    def usrdta(self) -> dict[str, Any]:
+        """Return the USRDTA frame of the device."""
+        return {
+            "title": "USRDTA",
+            "from": self.mac,
+            "to": "USER",
+            "name": self.name,
+            "aqName": "Simulated Tank",
+            "version": self.version,
+            "language": "EN",
+            "timezone": 60,
+            "tID": 1,
+            "dst": 1,
+            "tankconfig": "[]",
+            "power": "[]",
+            "netmode": "ST",
+            "host": f"eheim-{self.mac[-5:].replace(':', '')}",
+            "groupID": 0,
+            "meshing": 1,
+            "firstStart": 0,
+            "revision": [2036, 2036],
+            "latestAvailableRevision": [2036, 2036],
+            "firmwareAvailable": 0,
+            "emailAddr": "",
+            "liveTime": 0,
+            "usrName": "",
+            "unit": 0,
+            "demoUse": 0,
+        }
+
+    def frame(self, title: str) -> dict[str, Any]:
+        """Return the state frame with the given title."""
+        return {"title": title, "from": self.mac, "to": "USER", **self.state[title]}
+
+
+class EheimMasterSimulator:
+    """Stand-in for an EHEIM Digital master speaking the arduino subprotocol."""
+
+    def __init__(
+        self,
+        devices_per_type: int = 1,
+        versions: list[int] | None = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        drop_rate: float = 0.0,
+        keep_alive_interval: float | None = None,
+        push_interval: float | None = None,
+        seed: int | None = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        """Initialize the simulator with N devices of every device version."""
+        self._random = random.Random(seed)
+        self._bind = (host, port)
+        self._server = None
+        self._connections: set = set()
+        self._tasks: set[asyncio.Task] = set()
+        self.keep_alive_interval = keep_alive_interval
+        self.push_interval = push_interval
+        self.requests_received = 0
+        self.replies_sent = 0
+        self.replies_dropped = 0
+        self.pushes_sent = 0
+        self.keep_alives_answered = 0
+
+        self.devices: dict[str, SimulatedDevice] = {}
+        for version in versions if versions is not None else list(DEVICE_VERSIONS):
+            for index in range(devices_per_type):
+                mac = f"00:1A:2B:{version:02X}:{index // 256:02X}:{index % 256:02X}"
+                device = SimulatedDevice(
+                    mac=mac,
+                    version=version,
+                    name=f"{DEVICE_VERSIONS[version]} {index + 1}",
+                    latency=latency,
+                    jitter=jitter,
+                    drop_rate=drop_rate,
+                )
+                device.state = _initial_state(device.group)
+                self.devices[mac] = device
+
+    @property
+    def host(self) -> str:
+        """Return the host:port to pass to EheimDigitalWebSocketClient."""
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"{host}:{port}"
+
+    async def start(self) -> None:
+        """Start serving."""
+        self._server = await websockets.serve(
+            self._handle_connection, *self._bind, subprotocols=["arduino"]
+        )
+        for interval, loop in (
+            (self.keep_alive_interval, self._send_keep_alives),
+            (self.push_interval, self._send_pushes),
+        ):
+            if interval:
+                self._spawn(loop(interval))
+        LOGGER.info("Simulating %s devices on ws://%s/ws", len(self.devices), self.host)
+
+    async def stop(self) -> None:
+        """Stop serving and cancel pending replies."""
+        for task in list(self._tasks):
+            task.cancel()
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def __aenter__(self) -> EheimMasterSimulator:
+        """Start the simulator as an async context manager."""
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        """Stop the simulator when leaving the context."""
+        await self.stop()
+
+    def _spawn(self, coro) -> None:
+        """Run a coroutine in the background and keep a reference to it."""
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _handle_connection(self, websocket, *_args) -> None:
+        """Send the handshake and answer requests of one client."""
+        self._connections.add(websocket)
+        master = next(iter(self.devices.values()))
+        try:
+            await websocket.send(json.dumps([master.usrdta()]))
+            await websocket.send(
+                json.dumps(
+                    [
+                        {
+                            "title": "MESH_NETWORK",
+                            "from": master.mac,
+                            "to": "USER",
+                            "clientList": list(self.devices),
+                        }
+                    ]
+                )
+            )
+            async for raw in websocket:
+                try:
+                    message = json.loads(raw)
+                except ValueError:
+                    LOGGER.warning("Ignoring undecodable frame: %s", raw)
+                    continue
+                if message.get("title") == "KEEP_ALIVE":
+                    self.keep_alives_answered += 1
+                    continue
+                self.requests_received += 1
+                self._spawn(self._answer(websocket, message))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self._connections.discard(websocket)
+
+    async def _answer(self, websocket, message: dict[str, Any]) -> None:
+        """Answer one request after the device's latency."""
+        title = message.get("title")
+        target = message.get("to")
+        if title == "GET_MESH_NETWORK":
+            device = next(iter(self.devices.values()))
+            reply = {
+                "title": "MESH_NETWORK",
+                "from": device.mac,
+                "to": "USER",
+                "clientList": list(self.devices),
+            }
+        elif (device := self.devices.get(target)) is None:
+            return
+        elif title == "GET_USRDTA":
+            reply = device.usrdta()
+        elif title in COMMANDS and COMMANDS[title] in device.state:
+            reply_title = COMMANDS[title]
+            device.state[reply_title].update(
+                {
+                    key: value
+                    for key, value in message.items()
+                    if key not in ("title", "to", "from")
+                }
+            )
+            reply = device.frame(reply_title)
+        elif (reply_title := REPLIES.get(device.group, {}).get(title)) is not None:
+            reply = device.frame(reply_title)
+        else:
+            return
+
+        if self._random.random() < device.drop_rate:
+            self.replies_dropped += 1
+            return
+
+        delay = device.latency + self._random.uniform(-device.jitter, device.jitter)
+        await asyncio.sleep(max(delay, 0))
+        try:
+            await websocket.send(json.dumps(reply))
+        except websockets.ConnectionClosed:
+            return
+        self.replies_sent += 1
+
+    async def _broadcast(self, message: Any) -> None:
+        """Send a frame to every connected client."""
+        for websocket in list(self._connections):
+            with contextlib.suppress(websockets.ConnectionClosed):
+                await websocket.send(json.dumps(message))
+
+    async def _send_keep_alives(self, interval: float) -> None:
+        """Interleave keep-alive requests with the regular traffic."""
+        master = next(iter(self.devices.values()))
+        while True:
+            await asyncio.sleep(interval)
+            await self._broadcast(
+                {"title": "REQ_KEEP_ALIVE", "from": master.mac, "to": "USER"}
+            )
+
+    async def _send_pushes(self, interval: float) -> None:
+        """Push unsolicited state changes of random devices."""
+        devices = [device for device in self.devices.values() if device.state]
+        while devices:
+            await asyncio.sleep(interval)
+            device = self._random.choice(devices)
+            title = self._random.choice(list(device.state))
+            state = device.state[title]
+            if "isTemp" in state:
+                state["isTemp"] += self._random.choice((-1, 1))
+            elif "isPH" in state:
+                state["isPH"] += self._random.choice((-1, 1))
+            elif "freq" in state:
+                state["freq"] = self._random.randint(3000, 6000)
+            elif "currentValues" in state:
+                state["currentValues"] = [
+                    self._random.randint(0, 100) for _ in state["currentValues"]
+                ]
+            await self._broadcast(device.frame(title))
+            self.pushes_sent += 1
+
+
+async def _run(args: argparse.Namespace) -> None:
+    """Run the simulator until interrupted."""
+    simulator = EheimMasterSimulator(
+        devices_per_type=args.devices,
+        latency=args.latency,
+        jitter=args.jitter,
+        drop_rate=args.drop_rate,
+        keep_alive_interval=args.keep_alive_interval,
+        push_interval=args.push_interval,
+        seed=args.seed,
+        host=args.host,
+        port=args.port,
+    )
+    async with simulator:
+        await asyncio.Event().wait()
+
+
+def main() -> None:
+    """Parse the command line and run the simulator."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--devices", type=int, default=1, help="devices per type")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="seconds")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="0.0 - 1.0")
+    parser.add_argument("--keep-alive-interval", type=float, default=10.0)
+    parser.add_argument("--push-interval", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Tests for the EHEIM Digital integration."""
@@ -0,0 +1,31 @@
+"""Fixtures for the EHEIM Digital tests."""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from eheim_simulator import EheimMasterSimulator  # noqa: E402
+
+pytest_plugins = "pytest_homeassistant_custom_component"
+
+# One device of every supported group: filter, heater, LED controller, pH
+SIMULATED_VERSIONS = [4, 5, 9, 15]
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations, socket_enabled):
+    """Load the integration from custom_components and allow local sockets."""
+    yield
+
+
+@pytest.fixture
+async def simulator():
+    """Run a simulated master with one device of every group."""
+    async with EheimMasterSimulator(
+        versions=SIMULATED_VERSIONS, latency=0.001, seed=1
+    ) as simulator:
+        yield simulator
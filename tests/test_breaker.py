@@ -0,0 +1,95 @@
+"""Tests for the per-device circuit breaker."""
+from __future__ import annotations
+
+from custom_components.eheim_digital.breaker import EheimCircuitBreaker
+from custom_components.eheim_digital.const import (
+    BREAKER_BACKOFF,
+    BREAKER_CLOSED,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_HALF_OPEN,
+    BREAKER_MAX_BACKOFF,
+    BREAKER_OPEN,
+)
+
+MAC = "00:1A:2B:05:00:00"
+
+
+def _open_breaker(now: float = 0.0) -> EheimCircuitBreaker:
+    """Return a breaker opened by consecutive failures."""
+    breaker = EheimCircuitBreaker(MAC)
+    for _ in range(BREAKER_FAILURE_THRESHOLD):
+        breaker.record_failure(now)
+    return breaker
+
+
+def test_opens_after_consecutive_failures() -> None:
+    """Test that the breaker opens only at the failure threshold."""
+    breaker = EheimCircuitBreaker(MAC)
+    for _ in range(BREAKER_FAILURE_THRESHOLD - 1):
+        breaker.record_failure(0)
+    assert breaker.state == BREAKER_CLOSED
+    assert breaker.allow_request(0)
+
+    breaker.record_failure(0)
+    assert breaker.state == BREAKER_OPEN
+    assert breaker.retry_at == BREAKER_BACKOFF
+    assert not breaker.allow_request(BREAKER_BACKOFF - 1)
+
+
+def test_success_resets_the_failure_count() -> None:
+    """Test that an answer in between resets the consecutive failures."""
+    breaker = EheimCircuitBreaker(MAC)
+    for _ in range(BREAKER_FAILURE_THRESHOLD - 1):
+        breaker.record_failure(0)
+    breaker.record_success()
+    breaker.record_failure(0)
+    assert breaker.state == BREAKER_CLOSED
+
+
+def test_single_probe_after_backoff() -> None:
+    """Test that one probe is let through once the backoff has passed."""
+    breaker = _open_breaker()
+    assert breaker.allow_request(BREAKER_BACKOFF)
+    assert breaker.state == BREAKER_HALF_OPEN
+    assert not breaker.allow_request(BREAKER_BACKOFF)
+
+    breaker.record_success()
+    assert breaker.state == BREAKER_CLOSED
+    assert breaker.failures == 0
+    assert breaker.allow_request(BREAKER_BACKOFF)
+
+
+def test_failed_probe_doubles_the_backoff() -> None:
+    """Test that failed probes back off exponentially up to the maximum."""
+    breaker = _open_breaker()
+    now = 0.0
+    backoff = BREAKER_BACKOFF
+    while backoff < BREAKER_MAX_BACKOFF:
+        now = breaker.retry_at
+        assert breaker.allow_request(now)
+        breaker.record_failure(now)
+        backoff = min(backoff * 2, BREAKER_MAX_BACKOFF)
+        assert breaker.state == BREAKER_OPEN
+        assert breaker.retry_at == now + backoff
+
+    now = breaker.retry_at
+    breaker.allow_request(now)
+    breaker.record_failure(now)
+    assert breaker.backoff == BREAKER_MAX_BACKOFF
+
+
+def test_failures_while_open_are_ignored() -> None:
+    """Test that late failures do not move the retry time of an open breaker."""
+    breaker = _open_breaker()
+    breaker.record_failure(10)
+    assert breaker.retry_at == BREAKER_BACKOFF
+
+
+def test_aborted_probe_is_retried() -> None:
+    """Test that a probe lost with the connection does not count as failed."""
+    breaker = _open_breaker()
+    assert breaker.allow_request(BREAKER_BACKOFF)
+    breaker.abort_probe()
+    assert breaker.state == BREAKER_OPEN
+    assert breaker.backoff == BREAKER_BACKOFF
+    assert breaker.allow_request(BREAKER_BACKOFF)
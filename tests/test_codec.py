@@ -0,0 +1,40 @@
+"""Tests for the frame codec."""
+from __future__ import annotations
+
+from custom_components.eheim_digital.codec import (
+    decode_frame,
+    encode_request,
+    loads,
+)
+
+MAC = "00:1A:2B:05:00:00"
+
+
+def test_decode_single_message() -> None:
+    """Test that a frame with one object decodes to one message."""
+    (message,) = decode_frame('{"title":"HEATER_DATA","from":"%s","isTemp":248}' % MAC)
+    assert message.title == "HEATER_DATA"
+    assert message.sender == MAC
+    assert message.payload["isTemp"] == 248
+
+
+def test_decode_message_list() -> None:
+    """Test that a frame with a list decodes every object in it."""
+    messages = decode_frame(
+        b'[{"title":"MESH_NETWORK","from":"MASTER"},'
+        b'{"title":"USRDTA","from":"%s"},"noise"]' % MAC.encode()
+    )
+    assert [message.title for message in messages] == ["MESH_NETWORK", "USRDTA"]
+
+
+def test_decode_invalid_frames() -> None:
+    """Test that undecodable frames and bare values yield no messages."""
+    assert decode_frame("{not json") == []
+    assert decode_frame("42") == []
+
+
+def test_encode_request() -> None:
+    """Test that data requests are encoded once and reused."""
+    frame = encode_request("GET_EHEATER_DATA", MAC)
+    assert loads(frame) == {"title": "GET_EHEATER_DATA", "to": MAC, "from": "USER"}
+    assert encode_request("GET_EHEATER_DATA", MAC) is frame
@@ -0,0 +1,141 @@
+"""Tests for the outbound command queue."""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from custom_components.eheim_digital.command_queue import (
+    EheimCommandDroppedError,
+    EheimCommandQueue,
+)
+from custom_components.eheim_digital.const import (
+    DROP_NEWEST,
+    DROP_OLDEST,
+    PRIORITY_COMMAND,
+    PRIORITY_POLL,
+)
+
+
+@pytest.fixture
+def make_queue():
+    """Return a factory of queues and the lists of frames they wrote."""
+    queues: list[EheimCommandQueue] = []
+
+    def make(send=None, **kwargs) -> tuple[EheimCommandQueue, list[str]]:
+        written: list[str] = []
+
+        async def record(message: str) -> None:
+            written.append(message)
+
+        queue = EheimCommandQueue(send or record, **kwargs)
+        queues.append(queue)
+        return queue, written
+
+    yield make
+    for queue in queues:
+        queue.clear()
+
+
+async def test_commands_go_ahead_of_polls(make_queue) -> None:
+    """Test that queued commands are written before queued poll requests."""
+    queue, written = make_queue()
+    await asyncio.gather(
+        queue.send("poll-1"),
+        queue.send("poll-2"),
+        queue.send("command", PRIORITY_COMMAND),
+    )
+    assert written == ["command", "poll-1", "poll-2"]
+    assert queue.counters.sent == 3
+    assert not len(queue)
+
+
+async def test_coalescing_sends_only_the_newest_frame(make_queue) -> None:
+    """Test that frames with the same key replace each other in the queue."""
+    queue, written = make_queue()
+    await asyncio.gather(
+        queue.send("poll"),
+        queue.send("ccv-1", PRIORITY_COMMAND, ("CCV-SW", "mac")),
+        queue.send("ccv-2", PRIORITY_COMMAND, ("CCV-SW", "mac")),
+        queue.send("ccv-3", PRIORITY_COMMAND, ("CCV-SW", "mac")),
+    )
+    assert written == ["ccv-3", "poll"]
+    assert queue.counters.coalesced == 2
+    assert queue.counters.enqueued == 4
+
+
+async def test_drop_oldest_drops_a_poll_before_a_command(make_queue) -> None:
+    """Test that a full queue drops its oldest frame of the lowest priority."""
+    queue, written = make_queue(max_size=2, drop_policy=DROP_OLDEST)
+    results = await asyncio.gather(
+        queue.send("command", PRIORITY_COMMAND),
+        queue.send("poll-1"),
+        queue.send("poll-2"),
+        return_exceptions=True,
+    )
+    assert results[0] is None
+    assert isinstance(results[1], EheimCommandDroppedError)
+    assert results[2] is None
+    assert written == ["command", "poll-2"]
+    assert queue.counters.dropped == 1
+
+
+async def test_drop_newest_rejects_the_new_frame(make_queue) -> None:
+    """Test that a full queue rejects new frames with the drop-newest policy."""
+    queue, written = make_queue(max_size=2, drop_policy=DROP_NEWEST)
+    results = await asyncio.gather(
+        queue.send("poll-1"),
+        queue.send("poll-2"),
+        queue.send("poll-3"),
+        return_exceptions=True,
+    )
+    assert results[:2] == [None, None]
+    assert isinstance(results[2], EheimCommandDroppedError)
+    assert written == ["poll-1", "poll-2"]
+
+
+async def test_unknown_drop_policy(make_queue) -> None:
+    """Test that an unknown drop policy is rejected."""
+    with pytest.raises(ValueError):
+        make_queue(drop_policy="drop_random")
+
+
+async def test_polls_are_not_rate_limited(make_queue) -> None:
+    """Test that poll requests are written without waiting for tokens."""
+    queue, written = make_queue(rate=0.001, burst=1)
+    await asyncio.wait_for(
+        asyncio.gather(*(queue.send(f"poll-{i}", PRIORITY_POLL) for i in range(10))),
+        1,
+    )
+    assert len(written) == 10
+
+
+async def test_commands_are_rate_limited(make_queue) -> None:
+    """Test that commands beyond the burst wait for the token bucket."""
+    queue, written = make_queue(rate=0.001, burst=2)
+    sends = [
+        asyncio.create_task(queue.send(f"command-{i}", PRIORITY_COMMAND))
+        for i in range(3)
+    ]
+    await asyncio.sleep(0.05)
+    assert written == ["command-0", "command-1"]
+    queue.clear()
+    with pytest.raises(EheimCommandDroppedError):
+        await sends[2]
+
+
+async def test_failed_write_fails_the_caller(make_queue) -> None:
+    """Test that a write error reaches the caller and the writer keeps going."""
+    written: list[str] = []
+
+    async def send(message: str) -> None:
+        if message == "broken":
+            raise ConnectionError("closed")
+        written.append(message)
+
+    queue, _ = make_queue(send)
+    results = await asyncio.gather(
+        queue.send("broken"), queue.send("poll"), return_exceptions=True
+    )
+    assert isinstance(results[0], ConnectionError)
+    assert written == ["poll"]
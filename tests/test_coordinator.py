@@ -0,0 +1,73 @@
+"""Tests for the coordinator against the simulated master."""
+from __future__ import annotations
+
+import asyncio
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.const import CONF_IP_ADDRESS, STATE_UNAVAILABLE
+from homeassistant.core import HomeAssistant
+
+from custom_components.eheim_digital.const import DOMAIN
+from custom_components.eheim_digital.models import (
+    AcclimationSettings,
+    HeaterData,
+    MoonSettings,
+)
+
+HEATER = "00:1A:2B:05:00:00"
+LED = "00:1A:2B:0F:00:00"
+
+
+async def _setup(hass: HomeAssistant, simulator) -> MockConfigEntry:
+    """Set up the integration for the simulated master."""
+    entry = MockConfigEntry(domain=DOMAIN, data={CONF_IP_ADDRESS: simulator.host})
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    return entry
+
+
+async def _unload(hass: HomeAssistant, entry: MockConfigEntry) -> None:
+    """Unload the integration."""
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_setup(hass: HomeAssistant, simulator) -> None:
+    """Test that every entity has state after the first refresh."""
+    entry = await _setup(hass, simulator)
+    states = hass.states.async_all()
+    assert states
+    assert all(state.state != STATE_UNAVAILABLE for state in states)
+    await _unload(hass, entry)
+
+
+async def test_push_updates_the_store(hass: HomeAssistant, simulator) -> None:
+    """Test that a frame pushed by the master reaches the store."""
+    entry = await _setup(hass, simulator)
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    heater = simulator.devices[HEATER]
+    heater.state["HEATER_DATA"]["isTemp"] = 262
+    await simulator._broadcast(heater.frame("HEATER_DATA"))
+    await asyncio.sleep(0.05)
+    assert coordinator.store.get_data(HEATER, HeaterData).is_temp == 262
+    await _unload(hass, entry)
+
+
+async def test_led_settings_are_confirmed(hass: HomeAssistant, simulator) -> None:
+    """Test that the device confirms the optimistic state of LED settings."""
+    entry = await _setup(hass, simulator)
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+
+    await coordinator.async_set_acclimation_settings(LED, 10, 30, 2, True, True)
+    await coordinator.async_set_moonlight_settings(LED, 2, 20, True, False, 3)
+    assert coordinator.store.is_optimistic(LED, "ACCLIMATE")
+    await asyncio.sleep(0.05)
+
+    for title in ("ACCLIMATE", "MOON"):
+        assert not coordinator.store.is_optimistic(LED, title)
+    assert simulator.devices[LED].state["ACCLIMATE"]["pause"] is True
+    assert coordinator.store.get_data(LED, AcclimationSettings).accl_pause
+    assert coordinator.store.get_data(LED, MoonSettings).max_moonlight == 20
+    await _unload(hass, entry)
@@ -0,0 +1,102 @@
+"""Tests for the typed device state store."""
+from __future__ import annotations
+
+from custom_components.eheim_digital.models import (
+    AcclimationSettings,
+    EheimStateStore,
+    HeaterData,
+)
+
+MAC = "00:1A:2B:05:00:00"
+LED = "00:1A:2B:0F:00:00"
+HEATER_DATA = {
+    "title": "HEATER_DATA",
+    "from": MAC,
+    "isTemp": 248,
+    "sollTemp": 250,
+    "isHeating": 1,
+    "alert_State": 0,
+    "active": 1,
+}
+ACCLIMATE = {
+    "title": "ACCLIMATE",
+    "from": LED,
+    "duration": 10,
+    "intensityReduction": 30,
+    "currentAcclDay": 2,
+    "acclActive": 0,
+    "pause": 0,
+}
+
+
+def test_update_reports_changed_fields() -> None:
+    """Test that the first message changes every field and later ones only the changed."""
+    store = EheimStateStore()
+    assert store.update(MAC, HEATER_DATA) == set(HeaterData.FIELDS.values())
+    assert store.update(MAC, HEATER_DATA) == set()
+    assert store.update(MAC, {**HEATER_DATA, "isTemp": 251}) == {"isTemp"}
+    assert store.get_data(MAC, HeaterData).is_temp == 251
+
+
+def test_update_ignores_unknown_titles() -> None:
+    """Test that messages without state are not stored."""
+    store = EheimStateStore()
+    assert store.update(MAC, {"title": "MESH_NETWORK", "from": MAC}) == set()
+    assert MAC not in store
+
+
+def test_optimistic_state_is_confirmed() -> None:
+    """Test that optimistic state is kept until the device reports it."""
+    store = EheimStateStore()
+    store.update(LED, ACCLIMATE)
+    assert store.apply_optimistic(LED, "ACCLIMATE", {"pause": 1}) == {"pause"}
+    assert store.is_optimistic(LED, "ACCLIMATE")
+    assert store.get_data(LED, AcclimationSettings).accl_pause == 1
+
+    # A reply sent before the command does not confirm it
+    assert store.update(LED, {**ACCLIMATE, "duration": 12}) == set()
+    assert store.is_optimistic(LED, "ACCLIMATE")
+
+    assert store.update(LED, {**ACCLIMATE, "pause": 1}) == set()
+    assert not store.is_optimistic(LED, "ACCLIMATE")
+    assert store.get_data(LED, AcclimationSettings).accl_pause == 1
+
+
+def test_rollback_restores_the_latest_device_state() -> None:
+    """Test that a rollback restores the last state the device reported."""
+    store = EheimStateStore()
+    store.update(LED, ACCLIMATE)
+    store.apply_optimistic(LED, "ACCLIMATE", {"pause": 1})
+    store.update(LED, {**ACCLIMATE, "duration": 12})
+
+    assert store.rollback(LED, "ACCLIMATE") == {"pause", "duration"}
+    settings = store.get_data(LED, AcclimationSettings)
+    assert (settings.accl_pause, settings.duration) == (0, 12)
+    assert not store.is_optimistic(LED, "ACCLIMATE")
+    assert store.rollback(LED, "ACCLIMATE") == set()
+
+
+def test_rollback_without_previous_state() -> None:
+    """Test that rolling back a title never reported removes it."""
+    store = EheimStateStore()
+    store.apply_optimistic(LED, "ACCLIMATE", {"pause": 1})
+    assert store.rollback(LED, "ACCLIMATE") == set(AcclimationSettings.FIELDS.values())
+    assert store.entry(LED, "ACCLIMATE") is None
+
+
+def test_snapshot_round_trip() -> None:
+    """Test that a restored snapshot is stale until the device reports again."""
+    store = EheimStateStore()
+    store.update(MAC, HEATER_DATA)
+    snapshot = store.as_snapshot()
+
+    restored = EheimStateStore()
+    restored.restore({**snapshot, LED: {"UNKNOWN": [0, {}]}})
+    entry = restored.entry(MAC, "HEATER_DATA")
+    assert entry.stale
+    assert entry.data == store.get_data(MAC, HeaterData)
+    assert restored.entry(LED, "UNKNOWN") is None
+
+    # The first report after a restore changes every field
+    assert restored.update(MAC, HEATER_DATA) == set(HeaterData.FIELDS.values())
+    assert not restored.entry(MAC, "HEATER_DATA").stale
@@ -0,0 +1,64 @@
+"""Tests for the adaptive poll scheduler."""
+from __future__ import annotations
+
+from custom_components.eheim_digital.const import (
+    MAX_POLL_BACKOFF,
+    MIN_POLL_INTERVAL,
+    STABLE_POLLS_BEFORE_BACKOFF,
+)
+from custom_components.eheim_digital.devices import EheimDevice
+from custom_components.eheim_digital.scheduler import EheimPollScheduler
+
+HEATER = EheimDevice.from_payload(
+    {"title": "USRDTA", "from": "00:1A:2B:05:00:00", "version": 5}
+)
+INTERVAL = 60
+
+
+def _scheduler(request_budget: float = 1000) -> EheimPollScheduler:
+    """Return a scheduler polling heaters every INTERVAL seconds."""
+    return EheimPollScheduler({"heater": INTERVAL}, {"heater": 1}, request_budget)
+
+
+def _next_due(scheduler: EheimPollScheduler, now: float) -> float:
+    """Return the time from now until the heater is due."""
+    return scheduler._schedules[HEATER.mac].next_due - now
+
+
+def test_new_devices_are_due() -> None:
+    """Test that a device is due at once and waits its interval after a poll."""
+    scheduler = _scheduler()
+    assert scheduler.due_devices([HEATER], 0) == [HEATER]
+    scheduler.record_poll(HEATER, 0, changed=True, alert=False)
+    assert _next_due(scheduler, 0) == INTERVAL / 2
+    assert scheduler.due_devices([HEATER], 1) == []
+    scheduler.request_all()
+    assert scheduler.due_devices([HEATER], 1) == [HEATER]
+
+
+def test_stable_device_backs_off() -> None:
+    """Test that stable polls double the interval up to the maximum backoff."""
+    scheduler = _scheduler()
+    now = 0.0
+    for _ in range(STABLE_POLLS_BEFORE_BACKOFF * 4):
+        scheduler.record_poll(HEATER, now, changed=False, alert=False)
+    assert _next_due(scheduler, now) == INTERVAL * MAX_POLL_BACKOFF
+
+    for _ in range(10):
+        scheduler.record_poll(HEATER, now, changed=False, alert=True)
+    assert _next_due(scheduler, now) == MIN_POLL_INTERVAL
+
+
+def test_failure_retries_soon() -> None:
+    """Test that a device that did not answer is retried after the shortest interval."""
+    scheduler = _scheduler()
+    scheduler.record_poll(HEATER, 0, changed=False, alert=False)
+    scheduler.record_failure(HEATER, 100)
+    assert _next_due(scheduler, 100) == MIN_POLL_INTERVAL
+
+
+def test_budget_stretches_intervals() -> None:
+    """Test that intervals are stretched when they would exceed the budget."""
+    scheduler = _scheduler(request_budget=0.5)
+    scheduler.record_poll(HEATER, 0, changed=False, alert=False)
+    assert _next_due(scheduler, 0) == INTERVAL * 2
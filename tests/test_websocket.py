@@ -0,0 +1,76 @@
+"""Tests for the WebSocket client against the simulated master."""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from custom_components.eheim_digital.const import (
+    BREAKER_CLOSED,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_OPEN,
+    CONNECTION_READY,
+)
+from custom_components.eheim_digital.websocket import (
+    EheimDigitalWebSocketClient,
+    EheimDigitalWebSocketClientCommunicationError,
+    EheimDigitalWebSocketClientDeviceUnavailableError,
+)
+
+from .conftest import SIMULATED_VERSIONS
+
+HEATER = "00:1A:2B:05:00:00"
+LED = "00:1A:2B:0F:00:00"
+
+
+@pytest.fixture
+async def client(simulator):
+    """Return a client connected to the simulated master."""
+    client = EheimDigitalWebSocketClient(simulator.host, request_timeout=0.2)
+    await client.fetch_devices()
+    yield client
+    await client.disconnect_websocket()
+
+
+async def test_fetch_devices(simulator, client) -> None:
+    """Test that every simulated device is discovered."""
+    devices = await client.fetch_devices()
+    assert sorted(device.version for device in devices) == sorted(SIMULATED_VERSIONS)
+    assert client.connection_state == CONNECTION_READY
+
+
+async def test_request_reply(client) -> None:
+    """Test that a data request is answered with the state of the device."""
+    data = await client.get_heater_data(HEATER)
+    assert data["title"] == "HEATER_DATA"
+    assert data["from"] == HEATER
+
+
+async def test_commands_are_coalesced(simulator, client) -> None:
+    """Test that a burst of commands to one light sends the latest value."""
+    await asyncio.gather(
+        *(client.set_color_channel_values(LED, [i, i, i]) for i in range(10))
+    )
+    assert client.queue_counters.coalesced
+    await asyncio.sleep(0.05)
+    assert simulator.devices[LED].state["CCV"]["currentValues"] == [9, 9, 9]
+
+
+async def test_breaker_pauses_a_dead_device(simulator, client) -> None:
+    """Test that a silent device is paused without degrading the connection."""
+    simulator.devices[HEATER].latency = 10
+    for _ in range(BREAKER_FAILURE_THRESHOLD):
+        with pytest.raises(EheimDigitalWebSocketClientCommunicationError):
+            await client.get_heater_data(HEATER)
+    assert client.breaker_state(HEATER) == BREAKER_OPEN
+
+    with pytest.raises(EheimDigitalWebSocketClientDeviceUnavailableError):
+        await client.get_heater_data(HEATER)
+    assert client.connection_state == CONNECTION_READY
+
+    # Any frame of the device closes the breaker again
+    simulator.devices[HEATER].latency = 0.001
+    await simulator._broadcast(simulator.devices[HEATER].frame("HEATER_DATA"))
+    await asyncio.sleep(0.05)
+    assert client.breaker_state(HEATER) == BREAKER_CLOSED
+    assert (await client.get_heater_data(HEATER))["from"] == HEATER